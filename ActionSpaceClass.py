@@ -0,0 +1,190 @@
+from BuildingDataDictionary import building_data
+from itertools import product
+from math import gcd, prod
+import random
+
+
+# The actions available in a game state, enumerated lazily.
+#
+# An action is a triple ((buildings, purchases), col_distribution, research)
+# as accepted by MonteCarloTreeSearch.advance. Every candidate action is
+# identified with an index in a mixed radix number system whose digits are
+# the building choice of each colony, whether or not each colony's building
+# is purchased, the colonist distribution and the research choice. Some
+# indices don't correspond to an action (the building can't be purchased or
+# the purchases exceed the reserve), these are skipped.
+class ActionSpace:
+    def __init__(self, game):
+        self.building_choices = [colony.building_choices
+                                 for colony in game.colonies]
+
+        # cost of purchasing each colony's building choices, None if the
+        # building can't be purchased
+        self.purchase_costs = []
+        for colony, choices in zip(game.colonies, self.building_choices):
+            self.purchase_costs.append(
+                [game.production_cost(colony, building)
+                 if (building not in ['tradeGoods', 'housing',
+                                      'storeProduction']
+                     and colony.stored_production
+                     < building_data[building].cost)
+                 else None
+                 for building in choices]
+            )
+
+        self.col_distributions = game.col_distributions_list
+        self.research_choices = game.res_choices_list
+        self.reserve = game.reserve
+
+        # purchase combinations keyed by the purchasable (colony, cost) pairs
+        self.purchase_combs_cache = {}
+
+        # a colony's purchase digit is fixed at 0 if none of its building
+        # choices can be purchased
+        self.radices = (
+            [len(choices) for choices in self.building_choices]
+            + [2 if any(cost is not None for cost in costs) else 1
+               for costs in self.purchase_costs]
+            + [len(self.col_distributions), len(self.research_choices)]
+        )
+
+        # number of indices, an upper bound for the number of actions
+        self.size = prod(self.radices)
+
+    def encode(self, building_indices, purchases, distribution_index,
+               research_index):
+        digits = list(building_indices)
+        digits.extend(int(colony_index in purchases)
+                      for colony_index in range(len(building_indices)))
+        digits.extend([distribution_index, research_index])
+
+        index = 0
+        for radix, digit in zip(self.radices, digits):
+            index = index * radix + digit
+        return index
+
+    # returns the action with the given index, or None if there isn't one
+    def action(self, index):
+        digits = []
+        for radix in reversed(self.radices):
+            index, digit = divmod(index, radix)
+            digits.append(digit)
+        digits.reverse()
+
+        num_colonies = len(self.building_choices)
+        building_indices = digits[:num_colonies]
+        purchase_digits = digits[num_colonies:2 * num_colonies]
+
+        total_cost = 0
+        purchases = []
+        for colony_index, (building_index, is_purchased) in enumerate(
+                zip(building_indices, purchase_digits)):
+            if is_purchased:
+                cost = self.purchase_costs[colony_index][building_index]
+                if cost is None:
+                    return None
+                total_cost += cost
+                purchases.append(colony_index)
+
+        if total_cost > self.reserve:
+            return None
+
+        buildings = tuple(choices[building_index] for choices, building_index
+                          in zip(self.building_choices, building_indices))
+
+        return ((buildings, tuple(purchases)),
+                self.col_distributions[digits[-2]],
+                self.research_choices[digits[-1]])
+
+    # Combinations of colonies such that the building choice for every
+    # colony can be purchased without exceeding the game's reserve.
+    def purchase_choices(self, building_indices):
+        can_be_purchased = []
+        for colony_index, building_index in enumerate(building_indices):
+            cost = self.purchase_costs[colony_index][building_index]
+            if cost is not None:
+                can_be_purchased.append((colony_index, cost))
+
+        # The combinations only depend on the purchasable colonies and their
+        # costs, so building tuples that share them share the result.
+        key = tuple(can_be_purchased)
+        if key not in self.purchase_combs_cache:
+            self.purchase_combs_cache[key] = self.affordable_combinations(
+                can_be_purchased, self.reserve)
+        return self.purchase_combs_cache[key]
+
+    # Branch and bound over the (colony_index, cost) pairs sorted by cost:
+    # once a colony can't be added without exceeding the budget, neither can
+    # any of the more expensive ones. The combinations are returned in the
+    # order of itertools.combinations, smallest first.
+    @staticmethod
+    def affordable_combinations(can_be_purchased, budget):
+        if budget < 0:
+            return []
+
+        items = sorted(can_be_purchased, key=lambda item: item[1])
+        purchase_combs = []
+
+        def extend(start, combination, remaining):
+            purchase_combs.append(tuple(sorted(combination)))
+            for k in range(start, len(items)):
+                colony_index, cost = items[k]
+                if cost > remaining:
+                    break
+                extend(k + 1, combination + [colony_index], remaining - cost)
+
+        extend(0, [], budget)
+        purchase_combs.sort(key=lambda combination: (len(combination),
+                                                      combination))
+        return purchase_combs
+
+    # yields pairs (index, action) for every action, without building the
+    # list of all actions
+    def indexed_actions(self):
+        research_indices = range(len(self.research_choices))
+        distribution_indices = range(len(self.col_distributions))
+
+        for building_indices in product(*[range(len(choices)) for choices
+                                          in self.building_choices]):
+            buildings = tuple(choices[building_index]
+                              for choices, building_index
+                              in zip(self.building_choices, building_indices))
+
+            for purchases in self.purchase_choices(building_indices):
+                for i, j in product(distribution_indices, research_indices):
+                    index = self.encode(building_indices, purchases, i, j)
+                    action = ((buildings, purchases),
+                              self.col_distributions[i],
+                              self.research_choices[j])
+                    yield index, action
+
+    def __iter__(self):
+        for _, action in self.indexed_actions():
+            yield action
+
+    def indices(self):
+        for index, _ in self.indexed_actions():
+            yield index
+
+    # Yields every action once in a random order. The indices are visited
+    # in the order offset, offset + step, offset + 2 * step, ... modulo
+    # self.size, which is a permutation when step and self.size are coprime.
+    def shuffled(self, rng=random):
+        step = 1
+        if self.size > 2:
+            step = rng.randrange(1, self.size)
+            while gcd(step, self.size) != 1:
+                step = rng.randrange(1, self.size)
+        offset = rng.randrange(self.size)
+
+        for i in range(self.size):
+            action = self.action((offset + i * step) % self.size)
+            if action is not None:
+                yield action
+
+    # uniformly random action
+    def sample(self, rng=random):
+        while True:
+            action = self.action(rng.randrange(self.size))
+            if action is not None:
+                return action
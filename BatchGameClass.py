@@ -0,0 +1,685 @@
+from ColonyClass import Colony
+from GameClass import Game
+from BuildingDataDictionary import building_data
+import numpy as np
+import random
+
+# Buildings, climates, achievements and tech fields are referred to by their
+# index in these lists.
+building_names = list(building_data)
+building_index = {name: i for i, name in enumerate(building_names)}
+
+climate_names = list(Colony.population_multiplier_map)
+climate_index = {name: i for i, name in enumerate(climate_names)}
+
+field_names = list(Game.tech_tree)
+
+# per building arrays. Housing and trade goods are never completed, their
+# infinite cost is stored as 0.
+building_cost = np.array([building_data[b].cost
+                          if building_data[b].cost != float('inf') else 0
+                          for b in building_names])
+building_maintenance = np.array([building_data[b].maintenance
+                                 for b in building_names])
+
+# per climate arrays
+farming_multiplier = np.array([Colony.farming_multiplier_map[c]
+                               for c in climate_names])
+population_multiplier = np.array([Colony.population_multiplier_map[c]
+                                  for c in climate_names])
+climate_cost = np.array([Colony.climate_cost_map[c] for c in climate_names])
+
+# climate after terraforming, climates that can't be terraformed map to
+# themselves
+terraformed_climate = np.array(
+    [climate_index[Colony.terraforming_map.get(c, c)] for c in climate_names]
+)
+
+# buildings that don't need to be built to finish the game
+final_buildings = np.isin(
+    building_names,
+    ['tradeGoods', 'housing', 'freighterFleet', 'pollutionProcessor',
+     'atmosphereRenewer', 'storeProduction']
+)
+
+# buildings that are never sold
+cannot_be_sold = np.isin(
+    building_names, ['terraforming', 'soilEnrichment', 'gaiaTransformation']
+)
+
+NONE = -1
+
+
+def nearest_integer(x):
+    whole = np.trunc(x)
+    return np.where(x < whole + .5, whole, whole + 1).astype(np.int64)
+
+
+# K copies of a game advanced in lockstep with vectorized arithmetic.
+#
+# The state of the games is stored as arrays whose first axis is the copy
+# and whose second axis, for colony attributes, is the colony. Buildings,
+# climates, build queues, achievements and tech fields are stored as
+# indices (NONE for no build queue or research queue). The economic
+# properties and turn reproduce Colony and Game exactly. The only
+# difference is the random number generator used to sell buildings when
+# the reserve becomes negative. Turn summaries are not recorded.
+class BatchGame:
+    def __init__(self, game, num_copies, seed=None):
+        if len(game.in_transport) > 0:
+            raise ValueError('colonists in transport are not supported')
+
+        self.num_copies = num_copies
+        self.rng = random.Random(seed)
+        self.achievement_names = list(game.achievements)
+        self.achievement_index = {a: i for i, a
+                                  in enumerate(self.achievement_names)}
+
+        k, colonies = num_copies, game.colonies
+
+        def per_colony(values, dtype=np.int64):
+            return np.tile(np.array(values, dtype=dtype), (k, 1))
+
+        def per_game(value, dtype=np.int64):
+            return np.full(k, value, dtype=dtype)
+
+        # planet attributes, identical in every copy
+        self.size_class = np.array([c.size_class for c in colonies])
+        self.production_multiplier = np.array(
+            [c.production_multiplier for c in colonies])
+        self.robotic_factory_bonus = np.array(
+            [Colony.robotic_factory_map[c.mineral_richness]
+             for c in colonies])
+        self.gravity_penalty = np.array(
+            [Colony.gravity_multiplier_map[c.gravity] for c in colonies])
+        self.rp_multiplier = np.array([c.rp_multiplier for c in colonies])
+        self.ruleset = game.ruleset
+        self.bc_multiplier = np.array([c.bc_multiplier for c in colonies])
+
+        # colony state
+        self.num_farmers = per_colony([c.num_farmers for c in colonies])
+        self.num_workers = per_colony([c.num_workers for c in colonies])
+        self.num_scientists = per_colony([c.num_scientists for c in colonies])
+        self.current_population = per_colony(
+            [c.current_population for c in colonies])
+        self.raw_population = per_colony([c.raw_population for c in colonies])
+        self.previous_population = per_colony(
+            [c.previous_population for c in colonies])
+        self.stored_production = per_colony(
+            [c.stored_production for c in colonies])
+        self.climate = per_colony([climate_index[c.climate]
+                                   for c in colonies])
+        self.terraform_count = per_colony([c.terraform_count
+                                           for c in colonies])
+        self.imported_food = per_colony([c.imported_food for c in colonies])
+        self.build_queue = per_colony(
+            [NONE if c.build_queue is None else building_index[c.build_queue]
+             for c in colonies])
+        self.buildings = np.tile(
+            np.array([[c.buildings[b] for b in building_names]
+                      for c in colonies], dtype=bool),
+            (k, 1, 1)
+        )
+
+        # game state
+        self.stored_rp = per_game(game.stored_rp)
+        self.cumulative_rp = per_game(game.cumulative_rp)
+        self.reserve = per_game(game.reserve)
+        self.turn_count = per_game(game.turn_count)
+        self.food_freighters = per_game(game.food_freighters)
+        self.total_freighters = per_game(game.total_freighters)
+        self.tech_tree_positions = per_colony(
+            [game.tech_tree_positions[f] for f in field_names])
+        self.research_queue = per_game(
+            NONE if game.research_queue is None
+            else field_names.index(game.research_queue.field))
+        self.game_buildings = np.tile(
+            np.array([game.buildings[b] for b in building_names],
+                     dtype=bool), (k, 1))
+        self.achievements = np.tile(
+            np.array([game.achievements[a] for a in self.achievement_names],
+                     dtype=bool), (k, 1))
+
+        # tech tree tables of the ruleset as arrays: stored rp needed to
+        # finish each research level and the buildings and achievements it
+        # makes available
+        self.field_length = np.array([len(Game.tech_tree[f])
+                                      for f in field_names])
+        max_length = self.field_length.max()
+        self.level_research_cost = np.zeros((len(field_names), max_length),
+                                            dtype=np.int64)
+        self.level_buildings = np.zeros(
+            (len(field_names), max_length, len(building_names)), dtype=bool)
+        self.level_achievements = np.zeros(
+            (len(field_names), max_length, len(self.achievement_names)),
+            dtype=bool)
+
+        def bits(mask, length):
+            return [mask >> i & 1 == 1 for i in range(length)]
+
+        rules = game.ruleset
+        for f, field in enumerate(field_names):
+            for level in range(self.field_length[f]):
+                self.level_research_cost[f, level] = \
+                    rules.research_cost[field][level]
+                self.level_buildings[f, level] = bits(
+                    rules.level_buildings[field][level], len(building_names))
+                self.level_achievements[f, level] = bits(
+                    rules.level_achievements[field][level],
+                    len(self.achievement_names))
+
+    # boolean array [copy, colony] telling whether a building is built
+    def built(self, building):
+        return self.buildings[:, :, building_index[building]]
+
+    # boolean array [copy, 1] telling whether an achievement is researched
+    def achieved(self, achievement):
+        return self.achievements[:, self.achievement_index[achievement],
+                                 None]
+
+    # colony properties, arrays of shape [copy, colony]
+
+    @property
+    def gravity_multiplier(self):
+        return np.where(self.built('gravityGenerator'), 0,
+                        self.gravity_penalty)
+
+    @property
+    def planet_pollution_tolerance(self):
+        return np.where(self.achieved('nanoDisassemblers'),
+                        4 * self.size_class, 2 * self.size_class)
+
+    @property
+    def morale_multiplier(self):
+        return (.2 * self.built('holoSimulator')
+                + .3 * self.built('pleasureDome')
+                + .2 * self.achieved('realityNetwork'))
+
+    @property
+    def government_bonus(self):
+        return np.where(self.achieved(self.ruleset.improved_government),
+                        self.ruleset.improved_government_bonus,
+                        self.ruleset.government_bonus)
+
+    @property
+    def max_population(self):
+        return (nearest_integer(population_multiplier[self.climate]
+                                * self.size_class * 5)
+                + 2 * self.built('biospheres')
+                + 5 * self.achieved('advancedCityPlanning'))
+
+    # food produced with the given number of farmers
+    def food_for(self, num_farmers):
+        output = num_farmers * farming_multiplier[self.climate]
+        output = output + num_farmers * self.built('soilEnrichment')
+        output = output + num_farmers * self.achieved('biomorphicFungi')
+        output = output + 2 * num_farmers * self.built('weatherController')
+        output = output + num_farmers * self.built('astroUniversity')
+
+        output = output + output * (self.morale_multiplier
+                                    - self.gravity_multiplier)
+        output = output + 2 * self.built('hydroponicFarm')
+        output = output + 4 * self.built('subterraneanFarms')
+
+        return nearest_integer(output) - self.current_population
+
+    @property
+    def food(self):
+        return self.food_for(self.num_farmers)
+
+    @property
+    def production(self):
+        workers = self.num_workers
+        worker_production = workers * self.production_multiplier
+        from_buildings = np.zeros_like(workers)
+
+        worker_production = (worker_production
+                             + workers * self.built('astroUniversity'))
+        worker_production = (worker_production
+                             + workers * self.achieved('microliteConstruction'))
+
+        automated_factory = self.built('automatedFactory')
+        worker_production = worker_production + workers * automated_factory
+        from_buildings = from_buildings + 5 * automated_factory
+
+        robo_miner_plant = self.built('roboMinerPlant')
+        worker_production = worker_production + 2 * workers * robo_miner_plant
+        from_buildings = from_buildings + 10 * robo_miner_plant
+
+        deep_core_mine = self.built('deepCoreMine')
+        worker_production = worker_production + 3 * workers * deep_core_mine
+        from_buildings = from_buildings + 15 * deep_core_mine
+
+        worker_production = worker_production + worker_production * (
+            self.morale_multiplier - self.gravity_multiplier)
+
+        worker_production = np.where(
+            self.built('roboticFactory'),
+            worker_production + self.robotic_factory_bonus,
+            worker_production)
+
+        worker_production = nearest_integer(worker_production)
+
+        pollution_reduction_multiplier = (
+            np.where(self.built('pollutionProcessor'), .5, 1)
+            * np.where(self.built('atmosphereRenewer'), .25, 1))
+
+        pollution_penalty = np.ceil(
+            np.maximum(0, worker_production * pollution_reduction_multiplier
+                       - self.planet_pollution_tolerance) / 2
+        ).astype(np.int64)
+        pollution_penalty[self.built('coreWasteDump')] = 0
+        worker_production = worker_production - pollution_penalty
+
+        from_buildings = (from_buildings + self.current_population
+                          * self.built('recyclotron'))
+
+        return worker_production + from_buildings
+
+    @property
+    def rp(self):
+        scientists = self.num_scientists
+        from_scientists = scientists * self.rp_multiplier
+        from_buildings = np.zeros_like(scientists)
+
+        from_scientists = (from_scientists
+                           + scientists * self.built('astroUniversity'))
+        from_scientists = (from_scientists + scientists
+                           * self.achieved('heightenedIntelligence'))
+
+        research_lab = self.built('researchLab')
+        from_scientists = from_scientists + scientists * research_lab
+        from_buildings = from_buildings + 5 * research_lab
+
+        supercomputer = self.built('supercomputer')
+        from_scientists = from_scientists + 2 * scientists * supercomputer
+        from_buildings = from_buildings + 10 * supercomputer
+
+        from_buildings = from_buildings + 30 * self.built('autolab')
+
+        galactic_cybernet = self.built('galacticCybernet')
+        from_scientists = from_scientists + 3 * scientists * galactic_cybernet
+        from_buildings = from_buildings + 15 * galactic_cybernet
+
+        from_scientists = from_scientists + from_scientists * (
+            self.morale_multiplier + self.government_bonus
+            - self.gravity_multiplier)
+
+        return nearest_integer(from_scientists + from_buildings)
+
+    @property
+    def bc(self):
+        taxes_collected = self.bc_multiplier * self.current_population
+
+        morale_bonus = nearest_integer(taxes_collected
+                                       * self.morale_multiplier)
+        spaceport_bonus = (np.trunc(taxes_collected * .5).astype(np.int64)
+                           * self.built('spaceport'))
+        stock_exchange_bonus = taxes_collected * self.built('stockExchange')
+        currency_exchange_bonus = (
+            self.achieved('currencyExchange')
+            * np.trunc(taxes_collected * .5).astype(np.int64))
+        government_bonus = np.trunc(
+            taxes_collected * self.government_bonus).astype(np.int64)
+
+        is_trade_goods = self.build_queue == building_index['tradeGoods']
+        tradegoods = np.where(
+            is_trade_goods,
+            np.ceil(.5 * self.production).astype(np.int64), 0)
+
+        total_income = (taxes_collected
+                        + morale_bonus
+                        + spaceport_bonus
+                        + stock_exchange_bonus
+                        + currency_exchange_bonus
+                        + government_bonus
+                        + tradegoods)
+
+        maintenance_cost = self.buildings @ building_maintenance
+        climate_costs = nearest_integer(maintenance_cost
+                                        * climate_cost[self.climate])
+
+        return total_income - maintenance_cost - climate_costs
+
+    @property
+    def population_increment(self):
+        population = self.current_population
+        max_population = self.max_population
+
+        # colonies above their maximum population don't grow, their
+        # increment is never used
+        base_population_growth = np.floor(np.sqrt(np.maximum(
+            0, Colony.factor1 * population * (max_population - population)
+            / max_population)))
+
+        is_housing = self.build_queue == building_index['housing']
+        housing_bonus = np.where(
+            is_housing,
+            np.floor(Colony.factor2 * self.production
+                     / np.maximum(population, 1)), 0)
+
+        tech_bonus = np.where(self.achieved('microbiotics'), 25, 0)
+        tech_bonus = np.where(self.achieved('universalAntidote'), 50,
+                              tech_bonus)
+
+        cloning_center_bonus = 100 * self.built('cloningCenter')
+
+        food = self.food + self.imported_food
+        starvation_penalty = 50 * np.minimum(food, 0)
+
+        return (np.floor(base_population_growth
+                         * ((100 + tech_bonus + housing_bonus) / 100))
+                .astype(np.int64)
+                + cloning_center_bonus
+                + starvation_penalty)
+
+    # game properties, arrays of shape [copy]
+
+    @property
+    def available_freighters(self):
+        return self.total_freighters - self.food_freighters
+
+    @property
+    def game_food(self):
+        return self.food.sum(axis=1)
+
+    @property
+    def game_rp(self):
+        return self.rp.sum(axis=1)
+
+    @property
+    def game_bc(self):
+        food = self.game_food
+        return (self.bc.sum(axis=1)
+                + np.floor(.5 * food).astype(np.int64) * (food > 0)
+                - np.floor(.5 * self.food_freighters).astype(np.int64))
+
+    # Same allocation as Game.distribute_food, which hands out surplus food
+    # one unit at a time cycling over the colonies in deficit. With T units
+    # to hand out, every colony first receives min(need, L) units, where L
+    # is the largest level with sum(min(need, L)) <= T, and the remaining
+    # units go one each to the first colonies needing more than L.
+    def distribute_food(self, mask):
+        food = self.food
+        need = np.maximum(-food, 0)
+        surplus = np.maximum(food, 0).sum(axis=1)
+        units = np.minimum(np.minimum(surplus, need.sum(axis=1)),
+                           self.total_freighters)
+        units = np.maximum(units, 0)
+
+        low = np.zeros(self.num_copies, dtype=np.int64)
+        high = need.max(axis=1, initial=0)
+        while np.any(low < high):
+            middle = (low + high + 1) // 2
+            fits = np.minimum(need, middle[:, None]).sum(axis=1) <= units
+            low = np.where(fits, middle, low)
+            high = np.where(fits, high, middle - 1)
+
+        imported_food = np.minimum(need, low[:, None])
+        remaining = units - imported_food.sum(axis=1)
+        wants_more = need > low[:, None]
+        imported_food += (wants_more
+                          & (np.cumsum(wants_more, axis=1)
+                             <= remaining[:, None]))
+
+        self.imported_food[mask] = imported_food[mask]
+        self.food_freighters[mask] = units[mask]
+
+    def colony_turn(self):
+        # update colony population
+        population = self.current_population
+        max_population = self.max_population
+        increment = self.population_increment
+        grows = ((population < max_population)
+                 | ((population == max_population) & (increment < 0)))
+
+        self.previous_population = np.where(grows, population,
+                                            self.previous_population)
+        self.raw_population = np.where(grows,
+                                       self.raw_population + increment,
+                                       self.raw_population)
+        self.current_population = np.where(grows,
+                                           self.raw_population // 1000,
+                                           population)
+
+        # if population decreased and is not zero, decrease the numbers of
+        # colonists until they add up to the population
+        shrinks = (grows
+                   & (self.previous_population > self.current_population)
+                   & (self.current_population > 0))
+        difference = np.where(
+            shrinks, self.previous_population - self.current_population, 0)
+        for attribute in ['num_farmers', 'num_workers', 'num_scientists']:
+            value = getattr(self, attribute)
+            change = (difference > 0) & (value > 0)
+            setattr(self, attribute,
+                    np.where(change, np.maximum(value - difference, 0),
+                             value))
+            difference = np.where(change, difference - value, difference)
+
+        # update stored production and build queues
+        queue = self.build_queue
+        builds = ((queue != building_index['housing'])
+                  & (queue != building_index['tradeGoods'])
+                  & (queue != NONE))
+        self.stored_production = np.where(
+            builds, self.stored_production + self.production,
+            self.stored_production)
+
+        # terraforming is a special case
+        terraforming_cost = 250 * (1 + self.terraform_count)
+        terraformed = ((queue == building_index['terraforming'])
+                       & (self.stored_production >= terraforming_cost))
+        self.stored_production = np.where(
+            terraformed, self.stored_production - terraforming_cost,
+            self.stored_production)
+        self.terraform_count = self.terraform_count + terraformed
+        self.climate = np.where(terraformed,
+                                terraformed_climate[self.climate],
+                                self.climate)
+        # terran planets cannot be further terraformed except by gaia
+        # transformation
+        terran = terraformed & (self.climate == climate_index['terran'])
+        self.built('terraforming')[terran] = True
+
+        cost = building_cost[np.maximum(queue, 0)]
+        completed = (builds & ~terraformed
+                     & (queue != building_index['terraforming'])
+                     & (self.stored_production >= cost))
+        copies, colonies = np.nonzero(completed)
+        self.buildings[copies, colonies, queue[copies, colonies]] = True
+        self.stored_production = np.where(
+            completed, self.stored_production - cost, self.stored_production)
+
+        # freighter fleet
+        freighters = completed & (queue == building_index['freighterFleet'])
+        self.total_freighters = self.total_freighters + freighters.sum(axis=1)
+        self.built('freighterFleet')[freighters] = False
+
+        # radiation shield
+        shielded = (completed & (queue == building_index['radiationShield'])
+                    & (self.climate == climate_index['radiated']))
+        self.climate[shielded] = climate_index['barren']
+
+        # gaia transformation, a gaia planet cannot be further terraformed
+        gaia = completed & (queue == building_index['gaiaTransformation'])
+        self.climate[gaia] = climate_index['gaia']
+        self.built('terraforming')[gaia] = True
+
+        self.build_queue = np.where(terraformed | completed, NONE, queue)
+
+    def turn(self):
+        # update attributes cum_rp, stored_rp, bc, and reserve
+        rp = self.game_rp
+        self.stored_rp = self.stored_rp + rp
+        self.cumulative_rp = self.cumulative_rp + rp
+        self.reserve = self.reserve + self.game_bc
+
+        # distribute food using available freighters if there is a colony
+        # with a food deficit and a colony with a food surplus
+        food = self.food
+        distribute = (np.any(food + self.imported_food < 0, axis=1)
+                      & np.any(food > 0, axis=1))
+        if np.any(distribute):
+            self.distribute_food(distribute)
+
+        # update colonies
+        self.colony_turn()
+
+        # empty research queue and update game if research is finished
+        field = np.maximum(self.research_queue, 0)
+        copies = np.arange(self.num_copies)
+        level = np.minimum(self.tech_tree_positions[copies, field],
+                           self.field_length[field] - 1)
+        threshold = self.level_research_cost[field, level]
+        finished = (self.research_queue != NONE) & (self.stored_rp
+                                                     >= threshold)
+        if np.any(finished):
+            f, lv = field[finished], level[finished]
+            self.game_buildings[finished] |= self.level_buildings[f, lv]
+            self.achievements[finished] |= self.level_achievements[f, lv]
+            self.stored_rp = np.where(finished, self.stored_rp - threshold,
+                                      self.stored_rp)
+            self.tech_tree_positions[copies[finished], f] += 1
+            self.research_queue = np.where(finished, NONE,
+                                           self.research_queue)
+
+        # if reserve < 0, sell a random buildings until reserve >= 0.
+        for copy in np.nonzero(self.reserve < 0)[0]:
+            self.sell_buildings(copy)
+
+        self.turn_count = self.turn_count + 1
+
+    def sell_buildings(self, copy):
+        num_colonies = self.buildings.shape[1]
+        while self.reserve[copy] < 0:
+            colony = self.rng.randrange(num_colonies)
+            choices = np.nonzero(self.buildings[copy, colony]
+                                 & ~cannot_be_sold)[0]
+            building = self.rng.choice(choices)
+            self.reserve[copy] += building_cost[building] // 2
+            self.buildings[copy, colony, building] = False
+
+    # cost to purchase the remaining production of every build queue (0 for
+    # build queues that can't be purchased) and the production cost of the
+    # build queues
+    def production_cost(self):
+        queue = np.maximum(self.build_queue, 0)
+        cost = (building_cost[queue]
+                + 250 * self.terraform_count
+                * (self.build_queue == building_index['terraforming']))
+        pp = self.stored_production
+        completed = np.where(cost > 0, pp / np.maximum(cost, 1), 1)
+
+        purchase_cost = np.select(
+            [completed == 0,
+             completed < .10,
+             completed == .10,
+             completed < .5,
+             completed == .5,
+             completed < 1],
+            [4 * cost,
+             4 * cost - 10 * pp,
+             3 * cost,
+             3.5 * cost - 5 * pp,
+             cost,
+             2 * cost - 2 * pp],
+            0)
+        return np.trunc(purchase_cost).astype(np.int64), cost
+
+    # Advance every copy by one turn. The arguments are arrays: build
+    # queues (building indices) and numbers of farmers, workers and
+    # scientists of shape [copy, colony], whether to buy the production of
+    # each colony's building, and the research field index (or NONE) of
+    # shape [copy], like the actions of MonteCarloTreeSearch.advance.
+    def advance(self, build_queue, num_farmers, num_workers, num_scientists,
+                purchases, research):
+        self.build_queue = np.array(build_queue, dtype=np.int64)
+        self.num_farmers = np.array(num_farmers, dtype=np.int64)
+        self.num_workers = np.array(num_workers, dtype=np.int64)
+        self.num_scientists = np.array(num_scientists, dtype=np.int64)
+
+        purchase_cost, cost = self.production_cost()
+        buy = np.asarray(purchases, dtype=bool) & (self.stored_production
+                                                   < cost)
+        self.reserve = self.reserve - (purchase_cost * buy).sum(axis=1)
+        self.stored_production = np.where(buy, cost, self.stored_production)
+
+        research = np.asarray(research)
+        self.research_queue = np.where(
+            (self.research_queue == NONE) & (research != NONE), research,
+            self.research_queue)
+
+        self.turn()
+
+    # available buildings of each colony, shape [copy, colony, building]
+    @property
+    def available_buildings(self):
+        return self.game_buildings[:, None, :] & ~self.buildings
+
+    def is_finished(self):
+        research_complete = np.all(
+            self.tech_tree_positions == self.field_length, axis=1)
+        climate_complete = np.all(self.climate == climate_index['gaia'],
+                                  axis=1)
+        pop_complete = np.all(
+            self.current_population == self.max_population, axis=1)
+        buildings_complete = ~np.any(
+            self.available_buildings & ~final_buildings, axis=(1, 2))
+
+        return (research_complete & pop_complete
+                & buildings_complete & climate_complete)
+
+    # Random actions for every copy: a random available building for every
+    # colony whose build queue is free, enough farmers to feed each colony
+    # (if possible) with the other colonists split randomly between workers
+    # and scientists, and a random available research field.
+    def random_actions(self, rng=np.random):
+        k, c, b = self.buildings.shape
+
+        choices = self.available_buildings.copy()
+        full = self.current_population == self.max_population
+        choices[:, :, building_index['housing']] &= ~full
+        pick = np.argmax(rng.random_sample((k, c, b)) * choices, axis=2)
+
+        free = np.isin(self.build_queue,
+                       [NONE, building_index['tradeGoods'],
+                        building_index['housing'],
+                        building_index['storeProduction']])
+        build_queue = np.where(free, pick, self.build_queue)
+
+        # fewest farmers for which each colony's food is not negative
+        population = self.current_population
+        num_farmers = population.copy()
+        for farmers in range(population.max(initial=0), -1, -1):
+            candidate = np.minimum(farmers, population)
+            feeds = self.food_for(candidate) >= 0
+            num_farmers = np.where(feeds, candidate, num_farmers)
+
+        others = population - num_farmers
+        num_workers = np.floor(rng.random_sample((k, c))
+                               * (others + 1)).astype(np.int64)
+        num_scientists = others - num_workers
+
+        open_fields = self.tech_tree_positions < self.field_length
+        field_pick = np.argmax(rng.random_sample(open_fields.shape)
+                               * open_fields, axis=1)
+        research = np.where(open_fields.any(axis=1), field_pick, NONE)
+
+        purchases = np.zeros((k, c), dtype=bool)
+        return (build_queue, num_farmers, num_workers, num_scientists,
+                purchases, research)
+
+    # Play random actions until every copy is finished or max_turns turns
+    # have been played, returns the turn count of every copy
+    def rollout(self, max_turns=10000, rng=np.random):
+        finished_turn = np.full(self.num_copies, -1, dtype=np.int64)
+        for _ in range(max_turns):
+            finished = self.is_finished()
+            finished_turn = np.where(finished & (finished_turn < 0),
+                                     self.turn_count, finished_turn)
+            if np.all(finished_turn >= 0):
+                break
+            self.advance(*self.random_actions(rng))
+
+        return np.where(finished_turn >= 0, finished_turn, self.turn_count)
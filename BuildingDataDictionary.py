@@ -1,16 +1,13 @@
 from collections import namedtuple
+from Ruleset import tables
 
 Building = namedtuple('Building', ['cost', 'maintenance'])
 
-with open("BuildingData") as file:
-    lines = file.readlines()
-
-building_data = {}
-for line in lines:
-    if line[0] != '#':
-        name, cost, maintenance = line.split()
-        building_data[name] = Building(int(cost), int(maintenance))
-
-# tradegoods and housing
-building_data['housing'] = Building(float('inf'), 0)
-building_data['tradeGoods'] = Building(float('inf'), 0)
+# production cost and maintenance of each building, read from BuildingData
+# by Ruleset. Housing and trade goods have an infinite cost.
+building_data = {
+    name: Building(cost, maintenance)
+    for name, cost, maintenance in zip(tables['building_names'],
+                                       tables['building_cost'],
+                                       tables['building_maintenance'])
+}
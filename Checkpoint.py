@@ -0,0 +1,43 @@
+from GameSerialization import dumps, loads
+import os
+import pickle
+
+# A checkpoint of a search driver holds the game state (in the format of
+# GameSerialization, with the random number generator so that a resumed
+# search makes the same choices), the actions taken so far, the search
+# statistics and the driver's settings.
+version = 1
+
+
+# The checkpoint is written to a temporary file that then replaces path, so
+# an interrupted write leaves the previous checkpoint intact.
+def save_checkpoint(path, game, actions, stats, settings):
+    checkpoint = {'version': version,
+                  'game': dumps(game, include_rng=True),
+                  'actions': actions, 'stats': stats, 'settings': settings}
+
+    temporary_path = path + '.tmp'
+    with open(temporary_path, 'wb') as file:
+        pickle.dump(checkpoint, file)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary_path, path)
+
+    # make the rename itself durable
+    directory = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    try:
+        os.fsync(directory)
+    finally:
+        os.close(directory)
+
+
+# Returns the game, actions, stats and settings saved in the checkpoint
+def load_checkpoint(path):
+    with open(path, 'rb') as file:
+        checkpoint = pickle.load(file)
+
+    if checkpoint.get('version') != version:
+        raise ValueError('unsupported checkpoint version {}'
+                         .format(checkpoint.get('version')))
+    return (loads(checkpoint['game']), checkpoint['actions'],
+            checkpoint['stats'], checkpoint['settings'])
@@ -1,5 +1,8 @@
 from math import floor, ceil, sqrt
+from copy import copy
+from ZobristHash import feature_key, value_key
 from BuildingDataDictionary import building_data
+from FlagSetClass import BuildingSet
 
 
 def nearest_integer(x):
@@ -9,6 +12,20 @@ def nearest_integer(x):
         return int(x) + 1
 
 
+# Property whose value is kept in the colony's derived_stats until one of the
+# attributes it depends on is set (see Colony.invalidated_stats).
+def cached_stat(method):
+    name = method.__name__
+
+    def getter(self):
+        stats = self.derived_stats
+        if name not in stats:
+            stats[name] = method(self)
+        return stats[name]
+
+    return property(getter)
+
+
 class Planet:
     def __init__(self, size, mineral_richness, gravity, climate):
         # sizes: tiny, small, medium, large, huge
@@ -74,9 +91,33 @@ class Colony(Planet):
         'tundra': 0, 'desert': .25, 'barren': 0, 'radiated': .25, 'toxic': .5
     }
 
+    # economic properties cached in derived_stats
+    economic_stats = ('food', 'production', 'rp', 'bc', 'max_population',
+                      'population_increment')
+
+    # cached economic properties invalidated by setting each attribute.
+    # Buildings must be changed with set_building and game achievements with
+    # Game.process_research_level, which invalidate the cache themselves.
+    invalidated_stats = {
+        'num_farmers': ('food', 'population_increment'),
+        'num_workers': ('production', 'bc', 'population_increment'),
+        'num_scientists': ('rp',),
+        'current_population': ('food', 'production', 'bc',
+                               'population_increment'),
+        'imported_food': ('population_increment',),
+        'build_queue': ('bc', 'population_increment'),
+        'climate': economic_stats,
+        'buildings': economic_stats,
+        'game': economic_stats,
+    }
+
     def __init__(self, planet, name, num_farmers,
                  num_workers, num_scientists, initial_buildings,
                  build_queue='tradeGoods'):
+        # values of the economic properties computed since the last change
+        # of the attributes they depend on
+        self.derived_stats = {}
+
         super().__init__(planet.size, planet.mineral_richness, planet.gravity,
                          planet.climate)
 
@@ -97,9 +138,7 @@ class Colony(Planet):
         self.previous_population = self.current_population
 
         # buildings that have been built in the colony
-        self.buildings = {b: False for b in building_data}
-        for b in initial_buildings:
-            self.buildings[b] = True
+        self.buildings = BuildingSet.from_names(initial_buildings)
 
         # terran planet can't be terraformed any further
         # except by gia transformation
@@ -125,7 +164,8 @@ class Colony(Planet):
         self.bc_multiplier = 1
 
         # base research points produced per scientist
-        # rp_multiplier = base_rp (3) + Psilon_bonus (2)
+        # rp_multiplier = base_rp (3) + Psilon_bonus (2), replaced by the
+        # game's Ruleset.rp_multiplier
         self.rp_multiplier = 5
 
         # the number of times a planet has been terraformed
@@ -141,10 +181,99 @@ class Colony(Planet):
         # number of production points used to clean up pollution in colony
         self.pollution_penalty = 0
 
+        # Zobrist hash of the colony's state, see compute_hash. It is kept up
+        # to date by turn, Game.turn, Game.buy_production and
+        # MonteCarloTreeSearch.advance. Code changing the colony in other
+        # ways has to recompute it.
+        self.state_hash = self.compute_hash()
+
+    # features of the colony that are part of its hash
+    hashed_attributes = ['raw_population', 'stored_production', 'climate',
+                         'terraform_count', 'build_queue', 'imported_food']
+
+    def compute_hash(self):
+        state_hash = 0
+        for attribute in Colony.hashed_attributes:
+            state_hash ^= value_key(attribute, getattr(self, attribute))
+        for building, is_built in self.buildings.items():
+            if is_built:
+                state_hash ^= feature_key(('building', building))
+        return state_hash
+
+    # update the hash for an attribute changing from old_value to new_value
+    def rehash(self, attribute, old_value, new_value):
+        if old_value != new_value:
+            self.state_hash ^= (value_key(attribute, old_value)
+                                ^ value_key(attribute, new_value))
+
+    def set_attribute(self, attribute, value):
+        self.rehash(attribute, getattr(self, attribute), value)
+        setattr(self, attribute, value)
+
+    def set_building(self, building, is_built):
+        if self.buildings[building] != is_built:
+            self.buildings[building] = is_built
+            self.state_hash ^= feature_key(('building', building))
+            self.invalidate()
+
+    def __setattr__(self, attribute, value):
+        stats = Colony.invalidated_stats.get(attribute)
+        if stats is not None:
+            derived_stats = self.__dict__.get('derived_stats')
+            if derived_stats:
+                for stat in stats:
+                    derived_stats.pop(stat, None)
+        object.__setattr__(self, attribute, value)
+        if stats is not None:
+            self.stats_changed()
+
+    # forget every cached economic property
+    def invalidate(self):
+        self.derived_stats.clear()
+        self.stats_changed()
+
+    # tell the game that the colony's contribution to the empire totals has
+    # to be recomputed (see Game.update_totals)
+    def stats_changed(self):
+        game = self.__dict__.get('game')
+        if game is not None:
+            game.dirty_colonies.add(self.colony_index)
+
+    # Compact record of the colony's mutable state. Everything else (planet
+    # attributes, name, multipliers) never changes during a game.
+    def snapshot(self):
+        return (self.num_farmers, self.num_workers, self.num_scientists,
+                self.current_population, self.raw_population,
+                self.previous_population, self.buildings.copy(),
+                self.previous_build_queue, self.build_queue,
+                self.stored_production, self.turn_count, self.climate,
+                self.terraform_count, self.imported_food,
+                self.pollution_penalty, self.state_hash)
+
+    def restore(self, snapshot):
+        (self.num_farmers, self.num_workers, self.num_scientists,
+         self.current_population, self.raw_population,
+         self.previous_population, buildings,
+         self.previous_build_queue, self.build_queue,
+         self.stored_production, self.turn_count, self.climate,
+         self.terraform_count, self.imported_food,
+         self.pollution_penalty, self.state_hash) = snapshot
+
+        # the snapshot may be restored more than once
+        self.buildings = buildings.copy()
+
+    # copy of the colony belonging to the given game
+    def clone(self, game):
+        colony = copy(self)
+        colony.derived_stats = {}
+        colony.game = game
+        colony.buildings = self.buildings.copy()
+        return colony
+
     @property
     def available_buildings(self):
-        return [b for b in self.game.buildings
-                if self.game.buildings[b] and not self.buildings[b]]
+        return BuildingSet.decode(self.game.buildings.mask
+                                  & ~self.buildings.mask)
 
     # Used for monte carlo tree search
     @property
@@ -197,13 +326,13 @@ class Colony(Planet):
                 + .2 * self.game.achievements['realityNetwork']
                 )
 
-    @property
+    @cached_stat
     def max_population(self):
         return (nearest_integer(self.population_multiplier * self.size_class * 5)
                 + 2 * self.buildings['biospheres']
                 + 5 * self.game.achievements['advancedCityPlanning'])
 
-    @property
+    @cached_stat
     def food(self):
         output = self.num_farmers * self.farming_multiplier
 
@@ -235,7 +364,7 @@ class Colony(Planet):
         # return output rounded to nearest integer
         return nearest_integer(output) - self.current_population
 
-    @property
+    @cached_stat
     def production(self):
         worker_production = self.num_workers * self.production_multiplier
         from_buildings = 0
@@ -297,7 +426,7 @@ class Colony(Planet):
 
         return worker_production + from_buildings
 
-    @property
+    @cached_stat
     def rp(self):
         from_scientists = self.num_scientists * self.rp_multiplier
         from_buildings = 0
@@ -336,7 +465,7 @@ class Colony(Planet):
 
         return nearest_integer(from_scientists + from_buildings)
 
-    @property
+    @cached_stat
     def bc(self):
         # taxes collected from colonists
         taxes_collected = self.bc_multiplier * self.current_population
@@ -371,15 +500,14 @@ class Colony(Planet):
 
         # maintenance and climate costs will be subtracted from total income
 
-        maintenance_cost = sum(building_data[b].maintenance for b
-                               in building_data if self.buildings[b])
+        maintenance_cost = self.buildings.maintenance
 
         climate_cost = nearest_integer(maintenance_cost
                                        * Colony.climate_cost_map[self.climate])
 
         return total_income - maintenance_cost - climate_cost
 
-    @property
+    @cached_stat
     def population_increment(self):
         # base population growth
         base_population_growth = floor(
@@ -413,13 +541,62 @@ class Colony(Planet):
                 + cloning_center_bonus
                 + starvation_penalty)
 
+    # whether the colony's population changes by population_increment this
+    # turn
+    @property
+    def is_growing(self):
+        return (self.current_population < self.max_population or
+                (self.current_population == self.max_population
+                 and self.population_increment < 0))
+
+    # whether production is added to stored production this turn
+    @property
+    def is_building(self):
+        return self.build_queue not in ['housing', 'tradeGoods']
+
+    # production cost of the building in the build queue
+    @property
+    def build_queue_cost(self):
+        if self.build_queue == 'terraforming':
+            return 250 * (1 + self.terraform_count)
+        return building_data[self.build_queue].cost
+
+    # Number of turns until the turn in which the colony's population
+    # (current_population) changes or its building is completed, if nothing
+    # else changes in the meantime. Before that turn only raw_population and
+    # stored_production change, by the same amount every turn. Returns
+    # float('inf') if neither ever happens.
+    def turns_to_event(self):
+        turns = float('inf')
+
+        if self.is_growing:
+            increment = self.population_increment
+            if increment > 0:
+                turns = -((self.raw_population
+                           - 1000 * (self.current_population + 1))
+                          // increment)
+            elif increment < 0:
+                turns = ((self.raw_population - 1000 * self.current_population)
+                         // -increment + 1)
+
+        if self.build_queue is None:
+            return 1
+
+        if self.is_building:
+            remaining = self.build_queue_cost - self.stored_production
+            if remaining <= 0:
+                return 1
+            if self.production > 0:
+                turns = min(turns, -(-remaining // self.production))
+
+        return max(turns, 1)
+
     def turn(self):
         # update colony population
-        if (self.current_population < self.max_population or
-                (self.current_population == self.max_population
-                 and self.population_increment < 0)):
+        if self.is_growing:
             self.previous_population = self.current_population
-            self.raw_population += self.population_increment
+            self.set_attribute('raw_population',
+                               self.raw_population + self.population_increment)
             self.current_population = self.raw_population // 1000
 
             # used for GUI
@@ -438,50 +615,51 @@ class Colony(Planet):
                         break
 
         # update stored production and buildingQueue
-        if self.build_queue not in ['housing', 'tradeGoods']:
-            self.stored_production += self.production
+        if self.is_building:
+            stored_production = self.stored_production + self.production
 
             # terraforming is a special case
             if self.build_queue == 'terraforming':
-                if self.stored_production >= 250 * (1 + self.terraform_count):
-                    self.stored_production -= 250 * (1 + self.terraform_count)
-                    self.terraform_count += 1
+                if stored_production >= 250 * (1 + self.terraform_count):
+                    stored_production -= 250 * (1 + self.terraform_count)
+                    self.set_attribute('terraform_count',
+                                       self.terraform_count + 1)
 
-                    self.climate = Colony.terraforming_map[self.climate]
+                    self.set_attribute(
+                        'climate', Colony.terraforming_map[self.climate])
 
                     # terran planets cannot be further terraformed except
                     # by gaia transformation
                     if self.climate == 'terran':
-                        self.buildings['terraforming'] = True
+                        self.set_building('terraforming', True)
 
-                    self.build_queue = None
+                    self.set_attribute('build_queue', None)
 
-            elif self.stored_production >= building_data[self.build_queue].cost:
-                self.buildings[self.build_queue] = True
-                self.stored_production -= building_data[self.build_queue].cost
+            elif stored_production >= building_data[self.build_queue].cost:
+                self.set_building(self.build_queue, True)
+                stored_production -= building_data[self.build_queue].cost
 
                 # freighter fleet
                 if self.build_queue == 'freighterFleet':
-                    self.game.total_freighters += 1
-                    self.buildings['freighterFleet'] = False
+                    self.game.set_attribute('total_freighters',
+                                            self.game.total_freighters + 1)
+                    self.set_building('freighterFleet', False)
 
                 # radiation shield
                 if (self.build_queue == 'radiationShield'
                         and self.climate == 'radiated'):
-                    self.climate = 'barren'
+                    self.set_attribute('climate', 'barren')
 
-                # gia transformation
+                # gia transformation, a gaia planet cannot be further
+                # terraformed
                 if self.build_queue == 'gaiaTransformation':
-                    self.climate = 'gaia'
+                    self.set_attribute('climate', 'gaia')
+                    self.set_building('terraforming', True)
+
+                self.set_attribute('build_queue', None)
 
-                self.build_queue = None
+            self.set_attribute('stored_production', stored_production)
 
     def report(self):
-        print(f'name: {self.name}')
-        print(f'net bc: {self.bc}')
-        print(f'farmers: {self.num_farmers}, net food: {self.food}')
-        print(f'workers: {self.num_workers}, production: {self.production}')
-        print(f'scientists: {self.num_scientists}, rp: {self.rp}')
-        print(f'building: {self.build_queue}')
-        print(f'raw_pop: {self.raw_population}')
-        print(f'pop_increment: {self.population_increment}')
+        from Reporting import report_colony
+        report_colony(self)
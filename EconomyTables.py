@@ -0,0 +1,72 @@
+from collections import namedtuple
+
+# For a given colony configuration (planet, climate, population, buildings
+# and game achievements) food only depends on the number of farmers,
+# production on the number of workers and rp on the number of scientists.
+# The economy tables of a colony list them for every number of colonists
+# from 0 to the colony's population, so colonist distributions are evaluated
+# with lookups instead of the Colony properties. Tables are shared by all
+# colonies, games and turns with the same configuration.
+
+EconomyTables = namedtuple('EconomyTables', ['food', 'production', 'rp'])
+
+# colonists each table is a function of
+table_colonists = {'food': 'num_farmers', 'production': 'num_workers',
+                   'rp': 'num_scientists'}
+
+# (stat, configuration key) -> table, emptied when it reaches
+# max_cached_tables entries
+tables_cache = {}
+max_cached_tables = 10000
+
+
+# everything the food, production and rp of a colony depend on, besides its
+# numbers of farmers, workers and scientists
+def configuration_key(colony):
+    return (colony.size_class, colony.mineral_richness, colony.gravity,
+            colony.climate, colony.rp_multiplier, colony.current_population,
+            colony.buildings.mask, colony.game.achievements.mask)
+
+
+# the colony's food, production or rp for 0, 1, ..., current_population
+# farmers, workers or scientists. Tables are computed when first needed.
+def stat_table(colony, stat):
+    key = (stat, configuration_key(colony))
+    table = tables_cache.get(key)
+    if table is None:
+        if len(tables_cache) >= max_cached_tables:
+            tables_cache.clear()
+        table = tables_cache[key] = compute_table(colony, stat)
+    return table
+
+
+def compute_table(colony, stat):
+    attribute = table_colonists[stat]
+    num_colonists = getattr(colony, attribute)
+    pollution_penalty = colony.pollution_penalty
+
+    table = []
+    for colonists in range(colony.current_population + 1):
+        setattr(colony, attribute, colonists)
+        table.append(getattr(colony, stat))
+
+    setattr(colony, attribute, num_colonists)
+    colony.pollution_penalty = pollution_penalty
+    return tuple(table)
+
+
+def economy_tables(colony):
+    return EconomyTables(*(stat_table(colony, stat)
+                           for stat in EconomyTables._fields))
+
+
+# Food, production and rp of a colony for each (farmers, workers, scientists)
+# split, as three NumPy arrays.
+def evaluate_splits(colony, splits):
+    import numpy as np
+
+    tables = economy_tables(colony)
+    splits = np.asarray(splits, dtype=np.int64).reshape(-1, 3)
+    return (np.array(tables.food)[splits[:, 0]],
+            np.array(tables.production)[splits[:, 1]],
+            np.array(tables.rp)[splits[:, 2]])
@@ -0,0 +1,119 @@
+from BuildingDataDictionary import building_data
+from TechTree import achievements
+
+
+# A set of named flags stored as the bits of an integer. Flag i is the i-th
+# name of the class's names list. It can be used like a dict from names to
+# booleans (flags[name], flags[name] = value, items(), ...), while the mask
+# makes copying, comparing and set operations between flag sets O(1).
+class FlagSet:
+    names = []
+
+    def __init__(self, mask=0):
+        self.mask = mask
+
+    @classmethod
+    def from_names(cls, names):
+        flags = cls()
+        for name in names:
+            flags[name] = True
+        return flags
+
+    # names of the flags set in mask, in the order of the names list
+    @classmethod
+    def decode(cls, mask):
+        names = []
+        while mask:
+            low_bit = mask & -mask
+            names.append(cls.names[low_bit.bit_length() - 1])
+            mask ^= low_bit
+        return names
+
+    def __getitem__(self, name):
+        return self.mask & self.bits[name] != 0
+
+    def __setitem__(self, name, value):
+        if value:
+            self.mask |= self.bits[name]
+        else:
+            self.mask &= ~self.bits[name]
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self.bits
+
+    # sets the flags of mask
+    def add_mask(self, mask):
+        self.mask |= mask
+
+    def keys(self):
+        return list(self.names)
+
+    def values(self):
+        return [self.mask >> i & 1 == 1 for i in range(len(self.names))]
+
+    def items(self):
+        return list(zip(self.names, self.values()))
+
+    def copy(self):
+        return type(self)(self.mask)
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.mask == other.mask
+
+    def __hash__(self):
+        return hash(self.mask)
+
+    def __repr__(self):
+        return '{}({})'.format(type(self).__name__, self.decode(self.mask))
+
+    def __reduce__(self):
+        return type(self), (self.mask,)
+
+
+def flag_bits(names):
+    return {name: 1 << i for i, name in enumerate(names)}
+
+
+# buildings, in the order of building_data. The total maintenance of the
+# buildings in the set is kept up to date as buildings are added and
+# removed.
+class BuildingSet(FlagSet):
+    names = list(building_data)
+    bits = flag_bits(names)
+    maintenance_costs = [building_data[b].maintenance for b in names]
+
+    def __init__(self, mask=0):
+        super().__init__(mask)
+        self.maintenance = sum(self.maintenance_costs[i]
+                               for i in range(len(self.names))
+                               if mask >> i & 1)
+
+    def __setitem__(self, name, value):
+        bit = self.bits[name]
+        if (self.mask & bit != 0) != bool(value):
+            cost = building_data[name].maintenance
+            self.maintenance += cost if value else -cost
+        super().__setitem__(name, value)
+
+    def add_mask(self, mask):
+        for i in range(len(self.names)):
+            if (mask & ~self.mask) >> i & 1:
+                self.maintenance += self.maintenance_costs[i]
+        self.mask |= mask
+
+    def copy(self):
+        buildings = BuildingSet.__new__(BuildingSet)
+        buildings.mask = self.mask
+        buildings.maintenance = self.maintenance
+        return buildings
+
+
+class AchievementSet(FlagSet):
+    names = achievements
+    bits = flag_bits(names)
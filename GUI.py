@@ -260,7 +260,7 @@ class ResearchChoicesInfo(tk.Frame):
         if self.game.research_queue is not None:
             return ('Progress: '
                     + str(self.game.stored_rp) + '/'
-                    + str(int(1.5 * self.game.research_queue.rp_cost)))
+                    + str(self.game.research_cost))
         else:
             return f'Progress: {self.game.stored_rp}/None'
 
@@ -2,15 +2,29 @@ from TechTree import tree
 from BuildingDataDictionary import building_data
 import random
 from math import floor
-from tabulate import tabulate
-from itertools import cycle
+from copy import copy
+from ZobristHash import value_key
+from FlagSetClass import BuildingSet, AchievementSet
+from Ruleset import default_ruleset
 
 
 class Game:
     tech_tree = tree
 
+    # mask of the buildings that are never sold
+    cannot_be_sold = BuildingSet.from_names(
+        ['terraforming', 'soilEnrichment', 'gaiaTransformation']).mask
+
     def __init__(self, starting_tech_positions, colonies, reserve=200,
-                 stored_rp=0):
+                 stored_rp=0, seed=None, record_history=False,
+                 ruleset=None):
+        # race and government specific rules, see Ruleset
+        self.ruleset = default_ruleset if ruleset is None else ruleset
+
+        # random number generator of the game, used to sell buildings and
+        # by rollout policies. Copies of the game get a copy of it.
+        self.rng = random.Random(seed)
+
         self.tech_tree_positions = {field: 0 for field in tree}
         self.available_tech_fields = [field for field in self.tech_tree]
 
@@ -20,8 +34,19 @@ class Game:
 
         self.systems = []
 
+        # Sums of the colonies' food, freighters needed, population, rp and
+        # bc, kept up to date incrementally. colony_totals holds what each
+        # colony last contributed, and colonies whose economy changed since
+        # then are in dirty_colonies (see Colony.stats_changed).
+        self.empire_totals = dict.fromkeys(Game.total_stats, 0)
+        self.colony_totals = [dict.fromkeys(Game.total_stats, 0)
+                              for _ in colonies]
+        self.dirty_colonies = set()
+
         self.colonies = colonies
-        for colony in self.colonies:
+        for colony_index, colony in enumerate(self.colonies):
+            colony.colony_index = colony_index
+            colony.rp_multiplier = self.ruleset.rp_multiplier
             colony.game = self
 
         # distances between colonies
@@ -33,35 +58,115 @@ class Game:
         # array of freighter fleet objects transporting colonists
         self.in_transport = []
 
-        # turn summary information
-        self.colonies_summary = []
-        self.game_summary = []
+        # summary of every turn played, recorded only if record_history is
+        # set (see print_turn_summary)
+        self.history = None
+        if record_history:
+            from TurnHistoryClass import TurnHistory
+            self.history = TurnHistory(len(colonies))
 
         self.food_freighters = 0
         self.total_freighters = 10
 
         # buildings that have been researched so far
-        self.buildings = {b: False for b in building_data}
-        self.buildings['housing'] = True
-        self.buildings['tradeGoods'] = True
-        self.buildings['freighterFleet'] = True
-        self.buildings['storeProduction'] = True
+        self.buildings = BuildingSet.from_names(
+            ['housing', 'tradeGoods', 'freighterFleet', 'storeProduction'])
 
         # achievements that have been researched so far
-        self.achievements = {'advancedCityPlanning': False,
-                             'microliteConstruction': False,
-                             'nanoDisassemblers': False, 'federation': False,
-                             'currencyExchange': False, 'realityNetwork': False,
-                             'microbiotics': False, 'universalAntidote': False,
-                             'heightenedIntelligence': False,
-                             'biomorphicFungi': False}
+        self.achievements = AchievementSet()
 
         # initialize starting tech
         for field, pos in starting_tech_positions:
-            for res_level in self.tech_tree[field][:pos]:
-                self.process_research_level(res_level)
+            for position in range(pos):
+                self.process_research_level(field, position)
             self.tech_tree_positions[field] = pos
 
+        # Zobrist hash of the game's own state, see compute_hash
+        self.game_hash = self.compute_hash()
+
+    # features of the game that are part of its hash, besides the tech tree
+    # positions
+    hashed_attributes = ['stored_rp', 'reserve', 'research_queue',
+                         'food_freighters', 'total_freighters']
+
+    def compute_hash(self):
+        game_hash = 0
+        for attribute in Game.hashed_attributes:
+            game_hash ^= value_key(attribute, getattr(self, attribute))
+        for field, position in self.tech_tree_positions.items():
+            game_hash ^= value_key(('tech', field), position)
+        return game_hash
+
+    # Hash of the game state. Games that reach the same buildings,
+    # populations, tech positions, reserve, stored production, ... by
+    # different sequences of actions have the same hash. The hashes of the
+    # game and of its colonies are updated incrementally as the game
+    # changes.
+    @property
+    def state_hash(self):
+        state_hash = self.game_hash
+        for colony_index, colony in enumerate(self.colonies):
+            state_hash ^= value_key(('colony', colony_index),
+                                    colony.state_hash)
+        return state_hash
+
+    # update the hash for an attribute changing from old_value to new_value
+    def rehash(self, attribute, old_value, new_value):
+        if old_value != new_value:
+            self.game_hash ^= (value_key(attribute, old_value)
+                               ^ value_key(attribute, new_value))
+
+    def set_attribute(self, attribute, value):
+        self.rehash(attribute, getattr(self, attribute), value)
+        setattr(self, attribute, value)
+
+    # Compact record of the game's mutable state, together with the state of
+    # its colonies. The turn summaries are not part of the snapshot.
+    def snapshot(self):
+        return (self.tech_tree_positions.copy(),
+                self.available_tech_fields.copy(), self.stored_rp,
+                self.cumulative_rp, self.reserve, self.research_queue,
+                self.turn_count, self.in_transport.copy(),
+                self.food_freighters, self.total_freighters,
+                self.buildings.copy(), self.achievements.copy(),
+                self.game_hash,
+                [colony.snapshot() for colony in self.colonies])
+
+    def restore(self, snapshot):
+        (tech_tree_positions, available_tech_fields, self.stored_rp,
+         self.cumulative_rp, self.reserve, self.research_queue,
+         self.turn_count, in_transport, self.food_freighters,
+         self.total_freighters, buildings, achievements, self.game_hash,
+         colony_snapshots) = snapshot
+
+        # the snapshot may be restored more than once
+        self.tech_tree_positions = tech_tree_positions.copy()
+        self.available_tech_fields = available_tech_fields.copy()
+        self.in_transport = in_transport.copy()
+        self.buildings = buildings.copy()
+        self.achievements = achievements.copy()
+
+        for colony, colony_snapshot in zip(self.colonies, colony_snapshots):
+            colony.restore(colony_snapshot)
+
+    # Copy of the game that shares nothing mutable with the original. This
+    # costs O(number of colonies), unlike deepcopy which also copies the
+    # turn history. The copy doesn't record its turns.
+    def clone(self):
+        game = copy(self)
+        game.rng = copy(self.rng)
+        game.tech_tree_positions = self.tech_tree_positions.copy()
+        game.available_tech_fields = self.available_tech_fields.copy()
+        game.in_transport = self.in_transport.copy()
+        game.buildings = self.buildings.copy()
+        game.achievements = self.achievements.copy()
+        game.empire_totals = self.empire_totals.copy()
+        game.colony_totals = [totals.copy() for totals in self.colony_totals]
+        game.dirty_colonies = self.dirty_colonies.copy()
+        game.colonies = [colony.clone(game) for colony in self.colonies]
+        game.history = None
+        return game
+
     @property
     def available_freighters(self):
         return (self.total_freighters - 5 * len(self.in_transport)
@@ -69,43 +174,61 @@ class Game:
 
     @property
     def government_bonus(self):
-        return .75 if self.achievements['federation'] else .5
+        if self.achievements[self.ruleset.improved_government]:
+            return self.ruleset.improved_government_bonus
+        return self.ruleset.government_bonus
+
+    # empire totals, see update_totals
+    total_stats = ['food', 'freighters_needed', 'population', 'rp', 'bc']
+
+    # add the changes of the dirty colonies' stats to the empire totals
+    def update_totals(self):
+        for colony_index in self.dirty_colonies:
+            colony = self.colonies[colony_index]
+            food = colony.food
+            stats = {'food': food,
+                     'freighters_needed': 0 if food >= 0 else -food,
+                     'population': colony.current_population,
+                     'rp': colony.rp,
+                     'bc': colony.bc}
+
+            previous_stats = self.colony_totals[colony_index]
+            for stat, value in stats.items():
+                self.empire_totals[stat] += value - previous_stats[stat]
+            self.colony_totals[colony_index] = stats
+
+        self.dirty_colonies.clear()
+        return self.empire_totals
 
     @property
     def freighters_needed(self):
-        return sum(0 if colony.food >= 0 else abs(colony.food)
-                   for colony in self.colonies)
+        return self.update_totals()['freighters_needed']
 
     @property
     def food(self):
-        return sum(colony.food for colony in self.colonies)
+        return self.update_totals()['food']
 
     @property
     def population(self):
-        return sum(colony.current_population for colony in self.colonies)
+        return self.update_totals()['population']
 
     # If reserve becomes negative, sell buildings at random until reserve is
     # positive I'm not exactly sure how MOO2 chooses buildings at random. It
     # seems like the distribution is skewed towards buildings with lower
     # production costs.
     def sell_buildings(self):
-        cannot_be_sold = ['terraforming', 'soilEnrichment',
-                          'gaiaTransformation']
-
         while self.reserve < 0:
-            colony = random.choice(self.colonies)
+            colony = self.rng.choice(self.colonies)
 
             # buildings that have been built in colony and can be sold
-            building_choices = [
-                building for building, is_built in colony.buildings.items()
-                if is_built and building not in cannot_be_sold
-            ]
+            building_choices = BuildingSet.decode(colony.buildings.mask
+                                                  & ~Game.cannot_be_sold)
 
-            building = random.choice(building_choices)
+            building = self.rng.choice(building_choices)
 
             sold_for = building_data[building].cost // 2
-            self.reserve += sold_for
-            colony.buildings[building] = False
+            self.set_attribute('reserve', self.reserve + sold_for)
+            colony.set_building(building, False)
 
     # cost to purchase production for building in colony
     @staticmethod
@@ -141,64 +264,114 @@ class Game:
             production_cost += 250 * colony.terraform_count
 
         if colony.stored_production < production_cost:
-            self.reserve -= self.production_cost(colony, colony.build_queue)
-            colony.stored_production = production_cost
+            self.set_attribute('reserve', self.reserve - self.production_cost(
+                colony, colony.build_queue))
+            colony.set_attribute('stored_production', production_cost)
 
     @property
     def rp(self):
-        return sum(colony.rp for colony in self.colonies)
+        return self.update_totals()['rp']
 
     @property
     def bc(self):
-        return (sum(colony.bc for colony in self.colonies)
+        return (self.update_totals()['bc']
                 + floor(.5 * self.food) * (self.food > 0)
                 - floor(.5 * self.food_freighters)
                 - floor(2.5 * len(self.in_transport))
                 )
 
+    # whether surplus food is distributed this turn: there is a colony with a
+    # food deficit and a colony with a food surplus
+    @property
+    def food_is_distributed(self):
+        return (any(c.food + c.imported_food < 0 for c in self.colonies) and
+                any(c.food > 0 for c in self.colonies))
+
     # distribute surplus food among colonies using freighters
     def distribute_food(self):
-        self.food_freighters = 0
-        for colony in self.colonies:
-            colony.imported_food = 0
-
-        deficit = sum(colony.food for colony in self.colonies
-                      if colony.food < 0)
+        previous_food_freighters = self.food_freighters
+        previous_imported_food = [colony.imported_food
+                                  for colony in self.colonies]
+
+        self.food_freighters, imported_foods = self.food_allocation()
+        for colony, imported_food in zip(self.colonies, imported_foods):
+            colony.imported_food = imported_food
+
+        self.rehash('food_freighters', previous_food_freighters,
+                    self.food_freighters)
+        for colony, imported_food in zip(self.colonies,
+                                         previous_imported_food):
+            colony.rehash('imported_food', imported_food, colony.imported_food)
+
+    # Food freighters used and food imported by each colony when surplus food
+    # is distributed. Food is handed out one unit at a time to the colonies
+    # with a food deficit, in turn, until the surplus, the deficit or the
+    # freighters run out. The result is computed in one pass: with T units
+    # to hand out, every colony receives min(need, L) units, where L is the
+    # largest level with sum(min(need, L)) <= T, and the units left over go
+    # one each to the first colonies needing more than L.
+    def food_allocation(self):
+        needs = [-colony.food if colony.food < 0 else 0
+                 for colony in self.colonies]
         surplus = sum(colony.food for colony in self.colonies
                       if colony.food > 0)
 
         # I'm not sure if this distributes food in the exact same way
         # as in the game MOO2. But it looks like MOO2 tries to distribute
         # surplus food evenly among the colonies with food deficits.
-        colonies_cycle = cycle(self.colonies)
-        while surplus > 0 and deficit < 0 and self.available_freighters > 0:
-            colony = next(colonies_cycle)
-            if colony.food + colony.imported_food < 0:
-                colony.imported_food += 1
-                surplus -= 1
-                deficit += 1
-                self.food_freighters += 1
-
-    def process_research_level(self, res_level):
-        for achievement in res_level.achievements:
-            self.achievements[achievement] = True
-
-        for building in res_level.buildings:
-            self.buildings[building] = True
+        freighters = self.total_freighters - 5 * len(self.in_transport)
+        units = max(0, min(surplus, sum(needs), freighters))
+
+        low, high = 0, max(needs, default=0)
+        while low < high:
+            level = (low + high + 1) // 2
+            if sum(min(need, level) for need in needs) <= units:
+                low = level
+            else:
+                high = level - 1
+
+        remaining = units - sum(min(need, low) for need in needs)
+        imported_foods = []
+        for need in needs:
+            imported_food = min(need, low)
+            if need > low and remaining > 0:
+                imported_food += 1
+                remaining -= 1
+            imported_foods.append(imported_food)
+
+        return units, imported_foods
+
+    # make the buildings and achievements of the research level at the given
+    # position of field available
+    def process_research_level(self, field, position):
+        self.buildings.add_mask(self.ruleset.level_buildings[field][position])
+
+        # the colonies' economic properties depend on the achievements
+        achievements = self.ruleset.level_achievements[field][position]
+        if achievements & ~self.achievements.mask:
+            self.achievements.add_mask(achievements)
+            for colony in self.colonies:
+                colony.invalidate()
+
+    # stored rp needed to finish the research queue
+    @property
+    def research_cost(self):
+        field = self.research_queue.field
+        return self.ruleset.research_cost[field][
+            self.tech_tree_positions[field]]
 
     def turn(self):
         # turn summary
         self.turn_summary()
 
         # update attributes cum_rp, stored_rp, bc, and reserve
-        self.stored_rp += self.rp
-        self.cumulative_rp += sum(colony.rp for colony in self.colonies)
-        self.reserve += self.bc
+        self.set_attribute('stored_rp', self.stored_rp + self.rp)
+        self.cumulative_rp += self.rp
+        self.set_attribute('reserve', self.reserve + self.bc)
 
         # distribute food using available freighters if there is a colony
         # with a food deficit and a colony with a food surplus
-        if (any(c.food + c.imported_food < 0 for c in self.colonies) and
-                any(c.food > 0 for c in self.colonies)):
+        if self.food_is_distributed:
             self.distribute_food()
 
         # update colonies
@@ -207,22 +380,24 @@ class Game:
 
         # empty research queue and update game if research is finished
         if (self.research_queue is not None and
-                self.stored_rp >= int(1.5 * self.research_queue.rp_cost)):
+                self.stored_rp >= self.research_cost):
+            field = self.research_queue.field
+            position = self.tech_tree_positions[field]
 
             # make finished res_level's buildings and achievements available
-            self.process_research_level(self.research_queue)
+            self.process_research_level(field, position)
 
             # update stored_rp and tech_tree_positions
-            self.stored_rp -= int(1.5 * self.research_queue.rp_cost)
-            self.tech_tree_positions[self.research_queue.field] += 1
+            self.set_attribute('stored_rp',
+                               self.stored_rp - self.research_cost)
+            self.tech_tree_positions[field] = position + 1
+            self.rehash(('tech', field), position, position + 1)
 
             # remove exhausted tech fields
-            position = self.tech_tree_positions[self.research_queue.field]
-            field = self.research_queue.field
-            if position == len(self.tech_tree[field]):
+            if position + 1 == len(self.tech_tree[field]):
                 self.available_tech_fields.remove(field)
 
-            self.research_queue = None
+            self.set_attribute('research_queue', None)
 
         # if reserve < 0, sell a random buildings until reserve >= 0.
         if self.reserve < 0:
@@ -230,64 +405,105 @@ class Game:
 
         self.turn_count += 1
 
-    # Summarizes the state of the game before the turn button is pressed
-    def turn_summary(self):
-        # Turn summaries for colonies
-        self.colonies_summary.append([])
-        for colony in self.colonies:
-            building_cost = building_data[colony.build_queue].cost
-            self.colonies_summary[-1].append(
-                [colony.num_farmers, colony.food, colony.num_workers,
-                 colony.production, colony.num_scientists, colony.rp,
-                 colony.build_queue,
-                 str(colony.stored_production) + '/' + str(building_cost),
-                 colony.bc, colony.current_population, colony.climate,
-                 colony.max_population
-                 ]
-            )
-
-        # Turn summary for game
-        if self.research_queue is not None:
-            field = self.research_queue.field
-            research = field + str(self.research_queue.level)
+    # Number of turns, at most max_turns, that can be played before the next
+    # turn in which something other than stored production, stored rp,
+    # cumulative rp, reserve and raw population changes: a colony's
+    # population changes, a building or research is completed or the reserve
+    # becomes negative. The food distribution has to be stable, i.e.
+    # distribute_food must not change it. Returns 0 if there is no such
+    # event and max_turns is None.
+    def quiet_turns(self, max_turns=None):
+        if self.food_is_distributed:
+            units, imported_foods = self.food_allocation()
+            if (units != self.food_freighters
+                    or any(colony.imported_food != imported_food
+                           for colony, imported_food
+                           in zip(self.colonies, imported_foods))):
+                return 0
+
+        # the event turn itself has to be played
+        turns = min((colony.turns_to_event() for colony in self.colonies),
+                    default=float('inf'))
+
+        if self.research_queue is not None and self.rp > 0:
+            remaining = self.research_cost - self.stored_rp
+            turns = min(turns, max(-(-remaining // self.rp), 1))
+
+        if self.bc < 0:
+            turns = min(turns, max(self.reserve // -self.bc + 1, 1))
+
+        if max_turns is not None:
+            turns = min(turns, max_turns + 1)
+        elif turns == float('inf'):
+            return 0
+
+        return turns - 1
+
+    # Plays quiet_turns(max_turns) turns in one step, with the same result as
+    # calling turn that many times, and returns their number.
+    def fast_forward(self, max_turns=None):
+        num_turns = self.quiet_turns(max_turns)
+        if num_turns == 0:
+            return 0
+
+        rp, bc = self.rp, self.bc
+        previous_stored_rp, previous_reserve = self.stored_rp, self.reserve
+
+        growing = [colony for colony in self.colonies if colony.is_growing]
+        building = [colony for colony in self.colonies if colony.is_building]
+        previous_raw_populations = [colony.raw_population
+                                    for colony in growing]
+        previous_stored_productions = [colony.stored_production
+                                       for colony in building]
+
+        if self.history is None:
+            self.stored_rp += num_turns * rp
+            self.cumulative_rp += num_turns * rp
+            self.reserve += num_turns * bc
+            for colony in growing:
+                colony.raw_population += (num_turns
+                                          * colony.population_increment)
+            for colony in building:
+                colony.stored_production += num_turns * colony.production
         else:
-            research = 'None'
-
-        self.game_summary.append(
-            [self.food, self.rp, self.cumulative_rp, self.bc, self.reserve,
-             self.population, research, self.food_freighters,
-             self.total_freighters]
-        )
+            # The summary of every turn is recorded. The colonies' stats
+            # don't change, so they are read from the colonies' caches.
+            for _ in range(num_turns):
+                self.turn_summary()
+                self.stored_rp += rp
+                self.cumulative_rp += rp
+                self.reserve += bc
+                for colony in growing:
+                    colony.raw_population += colony.population_increment
+                for colony in building:
+                    colony.stored_production += colony.production
+
+        for colony, raw_population in zip(growing, previous_raw_populations):
+            colony.previous_population = colony.current_population
+            colony.rehash('raw_population', raw_population,
+                          colony.raw_population)
+        for colony, stored_production in zip(building,
+                                             previous_stored_productions):
+            colony.rehash('stored_production', stored_production,
+                          colony.stored_production)
+        self.rehash('stored_rp', previous_stored_rp, self.stored_rp)
+        self.rehash('reserve', previous_reserve, self.reserve)
+
+        self.turn_count += num_turns
+        return num_turns
+
+    # Summarizes the state of the game before the turn button is pressed,
+    # if the game records its history
+    def turn_summary(self):
+        if self.history is not None:
+            self.history.record(self)
 
+    # The reports are printed by Reporting, which is only imported when
+    # they are used so that the engine doesn't load tabulate.
     def print_turn_summary(self, starting_turn=0):
-        col_headers = ['farmers', 'net food', 'workers', 'prod.', 'scient.',
-                       'rp', 'building', 'progress', 'net bc', 'pop',
-                       'climate', 'pop_max']
-
-        game_headers = ['net food', 'rp', 'cum_rp', 'bc', 'reserve', 'pop',
-                        'researching', 'food freighters', 'num freighters']
-
-        turn = starting_turn
-        colonies_summary = self.colonies_summary[starting_turn:]
-        game_summary = self.game_summary[starting_turn:]
-        for col_summary, game_summary in zip(colonies_summary, game_summary):
-            print('turn:', turn)
-            print()
-            print(
-                tabulate(col_summary, headers=col_headers, tablefmt='simple'))
-            print()
-            print(tabulate([game_summary], headers=game_headers,
-                           tablefmt='simple'))
-            print()
-            print()
-            turn += 1
+        from Reporting import print_turn_summary
+        print_turn_summary(self, starting_turn)
 
     def report(self):
-        print(f'turn_count: {self.turn_count}')
-        print('reserve:', self.reserve)
-        print('income:', self.bc)
-        print('population:', self.population)
-        print(f'food_freighters, num_freighters: '
-              f'{self.food_freighters},{self.total_freighters}')
-        print('food:', self.food)
-        print('research:', self.rp)
+        from Reporting import report_game
+        report_game(self)
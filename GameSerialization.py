@@ -0,0 +1,222 @@
+from GameClass import Game
+from ColonyClass import Planet, Colony
+from FlagSetClass import BuildingSet, AchievementSet
+from ActionSpaceClass import ActionSpace
+from TechTree import tree
+from Ruleset import ruleset, governments
+from itertools import chain
+import struct
+
+# Compact binary format of the state of a Game or MonteCarloTreeSearch,
+# used for checkpoints and to send the game to worker processes. It holds
+# the ruleset, tech positions, research, stored rp, reserve and freighters
+# of the game, and the planet, colonists, population, buildings, build queue,
+# stored production, climate and terraform count of each colony, plus the
+# action lists of a MonteCarloTreeSearch and optionally the state of the
+# game's random number generator. Hashes and cached stats are recomputed
+# when the state is loaded. Search trees, turn histories and rollout
+# policies are not part of it. Names are stored as their index in these
+# lists and all numbers are little-endian.
+magic = b'MOO2'
+version = 3
+
+sizes = list(Colony.planet_size_map)
+mineral_richnesses = list(Colony.production_multiplier_map)
+gravities = list(Colony.gravity_multiplier_map)
+climates = list(Colony.population_multiplier_map)
+government_names = list(governments)
+fields = list(tree)
+
+# kind of game and flags of the header
+GAME, SEARCH = 0, 1
+HAS_RNG = 1
+
+header = struct.Struct('<4sBBBB')
+game_state = struct.Struct('<bBIqqqHHbQH' + 'B' * len(fields))
+colony_state = struct.Struct('<BBBBBBBBBiqIBhhQbb')
+rng_state = struct.Struct('<625I?d')
+
+
+def name_index(names, name):
+    return -1 if name is None else names.index(name)
+
+
+def index_name(names, index):
+    return None if index < 0 else names[index]
+
+
+def dumps(game, include_rng=False):
+    from MonteCarloTreeSearchClass import MonteCarloTreeSearch
+
+    if len(game.in_transport) > 0:
+        raise ValueError('colonists in transport cannot be serialized')
+
+    kind = SEARCH if isinstance(game, MonteCarloTreeSearch) else GAME
+    parts = [header.pack(magic, version, kind,
+                         HAS_RNG if include_rng else 0, len(game.colonies))]
+
+    research = (None if game.research_queue is None
+                else game.research_queue.field)
+    parts.append(game_state.pack(
+        game.ruleset.research_bonus,
+        government_names.index(game.ruleset.government), game.turn_count,
+        game.stored_rp, game.cumulative_rp, game.reserve,
+        game.food_freighters, game.total_freighters,
+        name_index(fields, research), game.buildings.mask,
+        game.achievements.mask,
+        *(game.tech_tree_positions[field] for field in fields)))
+
+    for colony in game.colonies:
+        name = colony.name.encode()
+        parts.append(struct.pack('<B', len(name)) + name)
+        parts.append(colony_state.pack(
+            sizes.index(colony.size),
+            mineral_richnesses.index(colony.mineral_richness),
+            gravities.index(colony.gravity), climates.index(colony.climate),
+            colony.num_farmers, colony.num_workers, colony.num_scientists,
+            colony.current_population, colony.previous_population,
+            colony.raw_population, colony.stored_production,
+            colony.turn_count, colony.terraform_count, colony.imported_food,
+            colony.pollution_penalty, colony.buildings.mask,
+            name_index(BuildingSet.names, colony.build_queue),
+            name_index(BuildingSet.names, colony.previous_build_queue)))
+
+    if include_rng:
+        _, internal_state, gauss_next = game.rng.getstate()
+        parts.append(rng_state.pack(*internal_state, gauss_next is not None,
+                                    gauss_next or 0.))
+
+    if kind == SEARCH:
+        parts.append(struct.pack('<I', len(game.res_choices_list)))
+        parts.append(bytes(name_index(fields, field) & 0xff
+                           for field in game.res_choices_list))
+        parts.append(struct.pack('<I', len(game.col_distributions_list)))
+        parts.append(bytes(chain.from_iterable(
+            chain.from_iterable(game.col_distributions_list))))
+
+    return b''.join(parts)
+
+
+def load_colony(colony, name, state):
+    (size, richness, gravity, climate, colony.num_farmers,
+     colony.num_workers, colony.num_scientists, colony.current_population,
+     colony.previous_population, colony.raw_population,
+     colony.stored_production, colony.turn_count, colony.terraform_count,
+     colony.imported_food, colony.pollution_penalty, buildings,
+     build_queue, previous_build_queue) = state
+
+    colony.name = name
+    colony.size = sizes[size]
+    colony.size_class = Colony.planet_size_map[colony.size]
+    colony.mineral_richness = mineral_richnesses[richness]
+    colony.production_multiplier = \
+        Colony.production_multiplier_map[colony.mineral_richness]
+    colony.gravity = gravities[gravity]
+    colony.climate = climates[climate]
+    colony.buildings = BuildingSet(buildings)
+    colony.build_queue = index_name(BuildingSet.names, build_queue)
+    colony.previous_build_queue = index_name(BuildingSet.names,
+                                             previous_build_queue)
+    colony.invalidate()
+    colony.state_hash = colony.compute_hash()
+
+
+# Game described by data. If a game is given, the state is loaded into it
+# instead, which keeps its configuration (rollout policy, logs, ...). It
+# must be of the same kind and have the same number of colonies.
+def loads(data, game=None):
+    from MonteCarloTreeSearchClass import MonteCarloTreeSearch
+
+    (data_magic, data_version, kind, flags,
+     num_colonies) = header.unpack_from(data)
+    if data_magic != magic:
+        raise ValueError('not a serialized game')
+    if data_version != version:
+        raise ValueError('unsupported game state version {}'
+                         .format(data_version))
+    offset = header.size
+
+    (research_bonus, government, turn_count, stored_rp, cumulative_rp,
+     reserve, food_freighters, total_freighters, research, buildings,
+     achievements, *positions) = game_state.unpack_from(data, offset)
+    offset += game_state.size
+    rules = ruleset(research_bonus, government_names[government])
+
+    colony_states = []
+    for _ in range(num_colonies):
+        name_length = data[offset]
+        name = data[offset + 1:offset + 1 + name_length].decode()
+        offset += 1 + name_length
+        colony_states.append((name, colony_state.unpack_from(data, offset)))
+        offset += colony_state.size
+
+    if game is None:
+        # the colonies get their state before the game is created, as a
+        # MonteCarloTreeSearch computes its actions from it
+        colonies = []
+        for name, state in colony_states:
+            colony = Colony(Planet(sizes[state[0]],
+                                   mineral_richnesses[state[1]],
+                                   gravities[state[2]], climates[state[3]]),
+                            name, *state[4:7], [])
+            load_colony(colony, name, state)
+            colonies.append(colony)
+
+        cls = MonteCarloTreeSearch if kind == SEARCH else Game
+        game = cls(list(zip(fields, positions)), colonies, ruleset=rules)
+    elif (kind == SEARCH) != isinstance(game, MonteCarloTreeSearch):
+        raise ValueError('the game state is of a different kind of game')
+    elif len(game.colonies) != num_colonies:
+        raise ValueError('the game state has a different number of colonies')
+
+    game.ruleset = rules
+    game.tech_tree_positions = dict(zip(fields, positions))
+    game.available_tech_fields = [field for field in fields
+                                  if game.tech_tree_positions[field]
+                                  < len(tree[field])]
+    research = index_name(fields, research)
+    game.research_queue = (None if research is None else
+                           tree[research][game.tech_tree_positions[research]])
+    game.turn_count = turn_count
+    game.stored_rp = stored_rp
+    game.cumulative_rp = cumulative_rp
+    game.reserve = reserve
+    game.food_freighters = food_freighters
+    game.total_freighters = total_freighters
+    game.in_transport = []
+    game.buildings = BuildingSet(buildings)
+    game.achievements = AchievementSet(achievements)
+
+    for colony, (name, state) in zip(game.colonies, colony_states):
+        colony.rp_multiplier = rules.rp_multiplier
+        load_colony(colony, name, state)
+
+    game.game_hash = game.compute_hash()
+
+    if flags & HAS_RNG:
+        *internal_state, has_gauss_next, gauss_next = rng_state.unpack_from(
+            data, offset)
+        offset += rng_state.size
+        game.rng.setstate((3, tuple(internal_state),
+                           gauss_next if has_gauss_next else None))
+
+    if kind == SEARCH:
+        (num_choices,) = struct.unpack_from('<I', data, offset)
+        offset += 4
+        game.res_choices_list = [
+            index_name(fields, struct.unpack_from('<b', data, offset + i)[0])
+            for i in range(num_choices)]
+        offset += num_choices
+
+        (num_distributions,) = struct.unpack_from('<I', data, offset)
+        offset += 4
+        numbers = data[offset:offset + 3 * num_colonies * num_distributions]
+        colonists = list(zip(numbers[::3], numbers[1::3], numbers[2::3]))
+        game.col_distributions_list = list(
+            zip(*(colonists[i::num_colonies] for i in range(num_colonies))))
+
+        # the tree was grown for another state
+        game.search_root = None
+        game.action_space = ActionSpace(game)
+
+    return game
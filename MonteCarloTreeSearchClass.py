@@ -1,10 +1,14 @@
 from GameClass import Game
-from ColonyClass import Colony
-from BuildingDataDictionary import building_data
-from itertools import product, combinations, starmap
-import random
-from copy import deepcopy
-from multiprocessing import Pool
+from ActionSpaceClass import ActionSpace
+from EconomyTables import stat_table
+from FlagSetClass import BuildingSet
+from SearchNodeClass import SearchNode
+from TranspositionTableClass import TranspositionTable
+from RolloutPolicies import RandomPolicy
+from SearchStatsClass import SearchStats, ActionStats
+from itertools import product
+from math import ceil, log, sqrt
+import time
 
 
 class MonteCarloTreeSearch(Game):
@@ -14,41 +18,129 @@ class MonteCarloTreeSearch(Game):
                                'subterraneanFarms', 'weatherController',
                                'gaiaTransformation', 'gravityGenerator']
 
-    def __init__(self, starting_tech_positions, colonies, reserve=200):
-        Game.__init__(self, starting_tech_positions, colonies, reserve)
+    # mask of the buildings that don't need to be built to finish the game
+    final_buildings = BuildingSet.from_names(
+        ['tradeGoods', 'housing', 'freighterFleet', 'pollutionProcessor',
+         'atmosphereRenewer', 'storeProduction']).mask
+
+    # exploration constant used by the UCT selection rule
+    exploration = 1.0
+
+    # Progressive widening: a node that has been visited n times may have
+    # at most ceil(widening_constant * (n + 1) ** widening_exponent)
+    # children.
+    widening_constant = 1.0
+    widening_exponent = .5
+
+    # a new node whose state has at least this many visits in the
+    # transposition table is valued from the table instead of a rollout
+    transposition_threshold = 1
+
+    # probability with which the anytime search may discard the best action
+    race_delta = .05
+
+    # Whether rollouts skip the turns in which no decision is pending (see
+    # fast_forward). The skipped turns keep the last action's colonist
+    # distribution instead of asking the rollout policy for a new one.
+    fast_forward_rollouts = False
+
+    # TrajectoryLogs the turns played by the game and by the copies of it
+    # used for rollouts are recorded in, if any. The records of a rollout
+    # have its seed as trajectory id and include the actions of the search
+    # leading to it. Turns skipped by fast_forward aren't recorded.
+    trajectory_log = None
+    rollout_log = None
+    trajectory_id = 0
+
+    # SearchStatsLog the statistics of every decision are written to, if any
+    stats_log = None
+
+    def __init__(self, starting_tech_positions, colonies, reserve=200,
+                 rollout_policy=None, seed=None, record_history=False,
+                 ruleset=None):
+        Game.__init__(self, starting_tech_positions, colonies, reserve,
+                      seed=seed, record_history=record_history,
+                      ruleset=ruleset)
+
+        # policy choosing the actions played in rollouts, see RolloutPolicies
+        self.rollout_policy = (RandomPolicy() if rollout_policy is None
+                               else rollout_policy)
+
+        # root of the UCT search tree, kept between turns so that the
+        # statistics of the chosen subtree can be reused
+        self.search_root = None
+
+        # smallest and largest rollout scores seen by the UCT search, used to
+        # scale the exploration term
+        self.score_range = [float('inf'), float('-inf')]
+
+        # worker processes used by choose_parallel, kept between turns
+        self.worker_pool = None
+
+        # value estimates shared by equivalent states in the UCT search
+        self.transposition_table = TranspositionTable()
+
+        # SearchStats of the last decision, shared with the copies of the
+        # game used for its rollouts
+        self.search_stats = None
 
         # variables to store possible actions from current game state
         self.col_distributions_list = []
-        self.building_choices_list = []
         self.res_choices_list = []
+        self.action_space = None
 
         # compute initial actions
-        self.building_choices()
         self.colonist_distributions()
         self.research_choices()
+        self.action_space = ActionSpace(self)
 
     # produces a list of tuples where...
     def colonist_distributions(self):
         # TODO check if each colony's climate permits farming
-        farmer_choices = product(*[range(c.current_population + 1)
-                                   for c in self.colonies])
-
-        # filter out choices of number of farmers that result in starvation
-        food_values = {}
-
-        for choice in farmer_choices:
-
-            for c, farmers in zip(self.colonies, choice):
-                c.num_farmers = farmers
 
-            if self.food >= 0:
-                food_values[choice] = [self.food, self.freighters_needed]
-
-        # what is this doing?
-        m1, m2 = min(food_values.values())
-
-        feasible_choices = [choice for choice in food_values if
-                            food_values[choice] == [m1, m2]]
+        # Food produced by each colony as a function of its number of
+        # farmers. The other colonists don't affect food production.
+        food_tables = [stat_table(c, 'food') for c in self.colonies]
+
+        # We want the choices of farmers for which the empire's food is
+        # non-negative and which minimize the pair [food, freighters_needed].
+        # Both are sums over colonies, so this is solved colony by colony:
+        # layers[i] maps each total food of the first i colonies to the
+        # fewest freighters needed to reach it.
+        layers = [{0: 0}]
+        for table in food_tables:
+            layer = {}
+            for total, freighters in layers[-1].items():
+                for food in table:
+                    key = total + food
+                    value = freighters + (0 if food >= 0 else -food)
+                    if value < layer.get(key, float('inf')):
+                        layer[key] = value
+            layers.append(layer)
+
+        m1 = min(total for total in layers[-1] if total >= 0)
+        m2 = layers[-1][m1]
+
+        # Recover every choice of farmers attaining [m1, m2]. The first i
+        # colonies of such a choice need the fewest freighters for their
+        # total food, otherwise a better choice would exist, so only entries
+        # of the layers have to be followed.
+        partial_choices = [((), m1, m2)]
+        for i in range(len(self.colonies), 0, -1):
+            previous_layer = layers[i - 1]
+            extended = []
+            for choice, total, freighters in partial_choices:
+                for farmers, food in enumerate(food_tables[i - 1]):
+                    previous_total = total - food
+                    previous_freighters = (freighters
+                                           - (0 if food >= 0 else -food))
+                    if (previous_layer.get(previous_total)
+                            == previous_freighters):
+                        extended.append(((farmers,) + choice, previous_total,
+                                         previous_freighters))
+            partial_choices = extended
+
+        feasible_choices = sorted(choice for choice, _, _ in partial_choices)
 
         # enumerate all distributions of colonists that don't result in
         # starvation
@@ -62,61 +154,99 @@ class MonteCarloTreeSearch(Game):
 
         self.col_distributions_list = col_distributions
 
+    # Combinations of colonies such that the building choice for every
+    # colony can be purchased without exceeding the game's reserve. The
+    # purchase costs are computed once per turn by the action space.
     def purchase_choices(self, building_choices_tuple):
-        # Compute a list of colony-pairs such that the build can be bought and
-        # and the colony's stored production doesn't exceed the buildings
-        # purchase cost.
-
-        can_be_purchased = []
-        for colony, building in zip(self.colonies, building_choices_tuple):
-            if (building not in ['tradeGoods', 'housing', 'storeProduction']
-                    and colony.stored_production < building_data[building].cost):
-                can_be_purchased.append((colony, building))
-
-        colony_index_map = {colony: colony_index for colony_index, colony
-                            in enumerate(self.colonies)}
-
-        # Combinations of colonies such that the building choice for every
-        # colony can be purchased without exceeding the game's reserve.
-        purchase_combs = []
-        for num_colonies in range(len(can_be_purchased) + 1):
-            for combination in combinations(can_be_purchased, num_colonies):
-                total_cost = sum(self.production_cost(colony, building)
-                                 for colony, building in combination)
-                if total_cost <= self.reserve:
-                    purchase_combs.append(
-                        [colony_index_map[colony]
-                         for colony, building in combination]
-                    )
-        return purchase_combs
-
+        building_indices = [
+            choices.index(building) for choices, building
+            in zip(self.action_space.building_choices, building_choices_tuple)
+        ]
+        return self.action_space.purchase_choices(building_indices)
+
+    # Pair each tuple of building choices with each way in which it's
+    # buildings can be purchased. The search itself uses self.action_space,
+    # which never builds this list.
     def building_choices(self):
         building_choices = product(
             *[colony.building_choices for colony in self.colonies]
         )
 
-        # Pair each tuple of building choices with each way in which it's
-        # buildings can be purchased.
-        self.building_choices_list = []
+        building_choices_list = []
         for choice in building_choices:
-            self.building_choices_list.extend(
+            building_choices_list.extend(
                 product([choice], self.purchase_choices(choice))
             )
+        return building_choices_list
 
     # returns a list of choices for the game's research queue
     def research_choices(self):
-        if self.res_queue is None:
+        if self.research_queue is None:
             if len(self.available_tech_fields) > 0:
-                self.res_choices_list = self.available_tech_fields
+                self.res_choices_list = list(self.available_tech_fields)
             else:
                 self.res_choices_list = [None]
         else:
-            self.res_choices_list = [self.res_queue.field]
+            self.res_choices_list = [self.research_queue.field]
+
+    # the search tree, the worker pool and the turn history are not part of
+    # the game state, so copies made for rollouts and for worker processes
+    # leave them behind
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['search_root'] = None
+        state['worker_pool'] = None
+        state['transposition_table'] = None
+        state['history'] = None
+        state['trajectory_log'] = None
+        state['search_stats'] = None
+        state['stats_log'] = None
+        return state
+
+    # The action lists and the action space are always replaced, never
+    # modified in place, so the snapshot and copies of the game can share
+    # them.
+    def snapshot(self):
+        return (Game.snapshot(self), self.action_space,
+                self.col_distributions_list, self.res_choices_list)
+
+    def restore(self, snapshot):
+        (game_snapshot, self.action_space,
+         self.col_distributions_list, self.res_choices_list) = snapshot
+        Game.restore(self, game_snapshot)
+
+    def clone(self):
+        game = Game.clone(self)
+        game.search_root = None
+        game.worker_pool = None
+        game.transposition_table = None
+        game.trajectory_log = None
+        game.search_stats = None
+        game.stats_log = None
+        return game
+
+    # copy of the game for a rollout with the given seed
+    def rollout_game(self, seed):
+        tic = time.perf_counter()
+        game = self.clone()
+        game.rng.seed(seed)
+        if self.rollout_log is not None:
+            game.trajectory_log = self.rollout_log
+            game.trajectory_id = seed
+        if self.search_stats is not None:
+            game.search_stats = self.search_stats
+            self.search_stats.times['clone'] += time.perf_counter() - tic
+        return game
 
     # advance game state by taking the given action
     def advance(self, action):
+        start_time = time.perf_counter()
         [buildings, purchase_combination], col_distributions, research = action
 
+        # keep the subtree of the action taken, discard the rest of the tree
+        if self.search_root is not None:
+            self.search_root = self.search_root.children.get(tuple(action))
+
         # assign building choices to build queues in colonies and
         # set distribution of workers for each colony
         for colony, building, col_distribution in zip(self.colonies, buildings,
@@ -125,7 +255,7 @@ class MonteCarloTreeSearch(Game):
                 col_distribution
 
             colony.previous_build_queue = building
-            colony.build_queue = building
+            colony.set_attribute('build_queue', building)
 
         # purchase production
         for colony_index in purchase_combination:
@@ -133,18 +263,20 @@ class MonteCarloTreeSearch(Game):
 
         # If research queue is empty, and there are unfinished research levels,
         # assign it a new research level.
-        if self.res_queue is None and research is not None:
+        if self.research_queue is None and research is not None:
             res_field_index = self.tech_tree_positions[research]
-            self.res_queue = Game.tech_tree[research][res_field_index]
+            self.set_attribute('research_queue',
+                               Game.tech_tree[research][res_field_index])
 
-        prev_res_queue = self.res_queue
-        prev_pop = self.population
+        if self.trajectory_log is not None:
+            self.trajectory_log.record(self, self.trajectory_id,
+                                       purchase_combination)
 
-        self.turn()
+        prev_res_queue = self.research_queue
+        prev_pops = [colony.current_population for colony in self.colonies]
 
-        # compute building choices and corresponding production purchase
-        # choices
-        self.building_choices()
+        self.turn()
+        turn_time = time.perf_counter()
 
         # compute research choices
         self.research_choices()
@@ -152,14 +284,16 @@ class MonteCarloTreeSearch(Game):
         # Has the food production in the game changed? If so, recompute
         # colonists distributions
 
-        if self.population > prev_pop:
+        # a colony's population changed (it can also shrink from starvation)
+        if any(colony.current_population != prev_pop
+               for colony, prev_pop in zip(self.colonies, prev_pops)):
             self.colonist_distributions()
 
         elif any(colony.build_queue is None and colony.previous_build_queue in
                  self.food_altering_buildings for colony in self.colonies):
             self.colonist_distributions()
 
-        elif (self.res_queue is None and
+        elif (self.research_queue is None and
               len(self.available_tech_fields) > 0 and
               ('realityNetwork' in prev_res_queue.achievements or
                'biomorphicFungi' in prev_res_queue.achievements)):
@@ -169,45 +303,412 @@ class MonteCarloTreeSearch(Game):
 
         # freighters
 
-    def sample(self, action, num_samples):
+        # building choices and corresponding production purchase choices
+        self.action_space = ActionSpace(self)
+
+        if self.search_stats is not None:
+            times = self.search_stats.times
+            times['advance'] += turn_time - start_time
+            times['enumeration'] += time.perf_counter() - turn_time
+
+    # Plays the rollout policy until the game is finished and returns the
+    # number of turns it took. The game's random number generator is
+    # reseeded every turn from a seed drawn from it and the turn count, so
+    # the random numbers of a turn of rollouts with the same seed don't
+    # depend on how many were used in earlier turns. The rollout is counted
+    # in the game's search_stats, if any.
+    def rollout(self, game):
+        stats = game.search_stats
+        if stats is None:
+            stats = SearchStats()
+        times = stats.times
+        starting_turn = game.turn_count
+
+        seed = game.rng.getrandbits(64)
+        while True:
+            tic = time.perf_counter()
+            finished = game.is_finished()
+            toc = time.perf_counter()
+            times['is_finished'] += toc - tic
+            if finished:
+                break
+
+            game.rng.seed(seed + (game.turn_count << 64))
+            action = self.rollout_policy(game)
+            times['policy'] += time.perf_counter() - toc
+            game.advance(action)
+            if self.fast_forward_rollouts:
+                tic = time.perf_counter()
+                game.fast_forward()
+                times['advance'] += time.perf_counter() - tic
+
+        if game.trajectory_log is not None:
+            game.trajectory_log.flush()
+        stats.rollout_lengths.append(game.turn_count - starting_turn)
+        return game.turn_count
+
+    # Average turn count of num_samples rollouts after action. Each rollout
+    # uses a copy of the game whose random number generator is seeded with
+    # the rollout's seed, drawn from self.rng unless seeds are given.
+    def sample(self, action, num_samples, seeds=None):
+        if seeds is None:
+            seeds = self.rollout_seeds(num_samples)
         scores = []
 
-        for _ in range(num_samples):
-            temp_game = deepcopy(self)
+        for seed in seeds[:num_samples]:
+            temp_game = self.rollout_game(seed)
             temp_game.advance(action)
-
-            while not temp_game.is_finished():
-                next_action = [random.choice(temp_game.building_choices_list),
-                               random.choice(temp_game.col_distributions_list),
-                               random.choice(temp_game.res_choices_list)]
-                temp_game.advance(next_action)
-
-            scores.append(temp_game.turn_count)
+            scores.append(self.rollout(temp_game))
+            if self.search_stats is not None:
+                self.search_stats.add_score(action, scores[-1])
 
         return action, sum(scores) / num_samples
 
-    def choose(self, num_samples):
-        actions = product(self.building_choices_list,
-                          self.col_distributions_list, self.res_choices_list)
+    def rollout_seeds(self, num_samples):
+        return [self.rng.getrandbits(64) for _ in range(num_samples)]
 
-        results = starmap(self.sample, product(actions, [num_samples]))
-        choice, value = min(results, key=lambda x: x[1])
+    # UCT selection rule. Scores are turn counts, so lower is better and the
+    # exploration term is subtracted.
+    def select_child(self, node):
+        low, high = self.score_range
+        scale = self.exploration * (high - low)
+        log_visits = log(node.visits)
 
-        self.advance(choice)
-
-    def choose_parallel(self, num_processes, num_samples):
-        actions = product(self.building_choices_list,
-                          self.col_distributions_list, self.res_choices_list)
+        return min(
+            node.children.items(),
+            key=lambda item: (item[1].value
+                              - scale * sqrt(log_visits / item[1].visits))
+        )
 
-        with Pool(processes=num_processes) as pool:
-            # results is an iterable of a list pairs of the form
-            # (action, sample(action, num_samples))
-            results = pool.starmap(self.sample,
-                                   product(actions, [num_samples]))
-            choice, value = min(results, key=lambda x: x[1])
+    # number of children a node may have after the given number of visits
+    def widening_limit(self, visits):
+        return ceil(self.widening_constant
+                    * (visits + 1) ** self.widening_exponent)
+
+    # one iteration of UCT: selection, expansion, rollout and backpropagation
+    def search_iteration(self):
+        game = self.rollout_game(self.rng.getrandbits(64))
+        node = self.search_root
+        path = [node]
+
+        # hash and turn count of the state at each node of the path
+        states = [(game.state_hash, game.turn_count)]
+        expanded = False
+
+        while not game.is_finished():
+            # Expansion. Untried actions are drawn lazily in a random order
+            # and a new one is only added when the node's visit count allows
+            # another child.
+            if node.untried_actions is None:
+                node.untried_actions = game.action_space.shuffled(game.rng)
+
+            if len(node.children) < self.widening_limit(node.visits):
+                action = next(node.untried_actions, None)
+                if action is not None:
+                    game.advance(action)
+                    child = SearchNode()
+                    node.children[action] = child
+                    path.append(child)
+                    states.append((game.state_hash, game.turn_count))
+                    expanded = True
+                    break
+
+            if len(node.children) == 0:
+                break
+
+            # selection
+            action, node = self.select_child(node)
+            game.advance(action)
+            path.append(node)
+            states.append((game.state_hash, game.turn_count))
+
+        # A new node whose state was already reached through another
+        # sequence of actions is valued from the transposition table.
+        entry = None
+        if expanded:
+            entry = self.transposition_table.lookup(states[-1][0])
+            if entry is not None and entry[0] < self.transposition_threshold:
+                entry = None
+
+        if entry is not None:
+            score = game.turn_count + entry[1] / entry[0]
+            states.pop()
+        else:
+            # rollout
+            score = self.rollout(game)
+            self.score_range = [min(self.score_range[0], score),
+                                max(self.score_range[1], score)]
+
+        # backpropagation
+        for node in path:
+            node.update(score)
+
+        for state_hash, turn_count in states:
+            self.transposition_table.update(state_hash, score - turn_count)
+
+    # New SearchStats for the decision about to be made, see
+    # SearchStatsClass
+    def start_stats(self, search, num_processes=1):
+        self.search_stats = SearchStats(search, self.turn_count,
+                                        num_processes)
+        return self.search_stats
+
+    # The decision was made and the choice taken, write its statistics to
+    # the stats log
+    def finish_stats(self, choice, start_time):
+        stats = self.search_stats
+        stats.choice = choice
+        stats.wall_time = time.perf_counter() - start_time
+        if self.stats_log is not None:
+            self.stats_log.write(stats)
+
+    # Run num_rollouts UCT iterations from the current game state, take the
+    # most visited action and return it. Statistics of the chosen subtree
+    # are kept for the next turn. The action statistics of the decision
+    # are those of the root's children, which include the rollouts of
+    # earlier turns through the root.
+    def choose_uct(self, num_rollouts):
+        start_time = time.perf_counter()
+        stats = self.start_stats('uct')
+        if self.search_root is None:
+            self.search_root = SearchNode()
+
+        for _ in range(num_rollouts):
+            self.search_iteration()
+
+        children = self.search_root.children
+        choice, _ = max(children.items(), key=lambda item: item[1].visits)
+        stats.num_actions = len(children)
+        stats.actions = {action: ActionStats(node.visits, node.value_sum,
+                                             node.value_square_sum)
+                         for action, node in children.items()}
 
         self.advance(choice)
+        self.finish_stats(choice, start_time)
+        return choice
+
+    # Hoeffding race between num_actions actions. Every round, each action
+    # that is still in the race gets one more rollout from
+    # sample_round(indices, max_rollouts, deadline), which returns pairs
+    # (index, score). An action leaves the race once its confidence interval
+    # lies entirely above the best action's. The race ends when one action
+    # is left or the time budget or the number of rollouts is used up, and
+    # returns the index of the action with the lowest mean score. Rounds
+    # sample the actions in index order, so callers number them randomly.
+    def race(self, num_actions, sample_round, time_budget=None,
+             max_rollouts=None):
+        if time_budget is None and max_rollouts is None:
+            raise ValueError('either time_budget or max_rollouts is required')
+
+        deadline = None
+        if time_budget is not None:
+            deadline = time.perf_counter() + time_budget
+
+        visits = [0] * num_actions
+        score_sums = [0] * num_actions
+        low, high = float('inf'), float('-inf')
+        num_rollouts = 0
+
+        alive = list(range(num_actions))
+        while len(alive) > 1:
+            remaining = None
+            if max_rollouts is not None:
+                remaining = max_rollouts - num_rollouts
+            if ((remaining is not None and remaining <= 0) or
+                    (deadline is not None
+                     and time.perf_counter() >= deadline)):
+                break
+
+            for i, score in sample_round(alive, remaining, deadline):
+                visits[i] += 1
+                score_sums[i] += score
+                low, high = min(low, score), max(high, score)
+                num_rollouts += 1
+
+            # confidence radius of an action sampled n times, the union
+            # bound is taken over actions and rounds
+            def radius(n):
+                return (high - low) * sqrt(
+                    log(4 * num_actions * n * n / self.race_delta) / (2 * n))
+
+            # the round was cut short by the budget
+            if any(visits[i] == 0 for i in alive):
+                continue
+
+            best_upper = min(score_sums[i] / visits[i] + radius(visits[i])
+                             for i in alive)
+            alive = [i for i in alive
+                     if score_sums[i] / visits[i] - radius(visits[i])
+                     <= best_upper]
+
+        sampled = [i for i in alive if visits[i] > 0] or alive
+        return min(sampled, key=lambda i: (score_sums[i] / visits[i]
+                                           if visits[i] > 0 else 0))
+
+    # Returns a function giving the seeds of the next rollouts of an action.
+    # With common_seeds the n-th rollout of every action uses the same seed
+    # (common random numbers), so actions are compared on the same random
+    # futures and fewer rollouts are needed to tell them apart. Otherwise
+    # every rollout gets its own seed from self.rng.
+    def seed_generator(self, common_seeds):
+        base = self.rng.getrandbits(64)
+        counts = {}
+
+        def next_seeds(action_key, num_samples):
+            if not common_seeds:
+                return self.rollout_seeds(num_samples)
+            count = counts.get(action_key, 0)
+            counts[action_key] = count + num_samples
+            return [base + count + i for i in range(num_samples)]
+
+        return next_seeds
+
+    # Takes the action with the lowest mean rollout score and returns it.
+    # Without num_samples, choose is an anytime search: rollouts are
+    # allocated adaptively (see race) until time_budget seconds have passed,
+    # max_rollouts rollouts have been run or the best action is separated
+    # from the others. See seed_generator for common_seeds.
+    def choose(self, num_samples=None, time_budget=None, max_rollouts=None,
+               common_seeds=False):
+        start_time = time.perf_counter()
+        stats = self.start_stats('flat')
+        next_seeds = self.seed_generator(common_seeds)
+
+        if num_samples is not None:
+            results = (self.sample(action, num_samples,
+                                   next_seeds(action, num_samples))
+                       for action in stats.timed(self.action_space,
+                                                 'enumeration'))
+            choice, value = min(results, key=lambda x: x[1])
+            stats.num_actions = len(stats.actions)
+            self.advance(choice)
+            self.finish_stats(choice, start_time)
+            return choice
+
+        actions = list(stats.timed(self.action_space, 'enumeration'))
+        stats.num_actions = len(actions)
+
+        # in a random order, so that a budget too small for a whole round
+        # doesn't always leave out the same actions
+        self.rng.shuffle(actions)
+
+        def sample_round(indices, max_rollouts, deadline):
+            results = []
+            for i in indices[:max_rollouts]:
+                if deadline is not None and time.perf_counter() >= deadline:
+                    break
+                _, score = self.sample(actions[i], 1, next_seeds(i, 1))
+                results.append((i, score))
+            return results
+
+        choice = self.race(len(actions), sample_round, time_budget,
+                           max_rollouts)
+        self.advance(actions[choice])
+        self.finish_stats(actions[choice], start_time)
+        return actions[choice]
+
+    def choose_parallel(self, num_processes, num_samples=None,
+                        time_budget=None, max_rollouts=None,
+                        common_seeds=False):
+        start_time = time.perf_counter()
+        stats = self.start_stats('parallel', num_processes)
+        if (self.worker_pool is None
+                or self.worker_pool.num_processes != num_processes):
+            # multiprocessing is only imported by searches that use it
+            from WorkerPoolClass import WorkerPool
+
+            self.close_pool()
+            self.worker_pool = WorkerPool(num_processes)
+
+        # the game state is sent to each worker once, the actions are then
+        # referred to by their index in self.action_space
+        tic = time.perf_counter()
+        try:
+            self.worker_pool.set_state(self)
+        except Exception:
+            # the barrier of the pool is broken, the next search starts a
+            # new pool
+            self.close_pool()
+            raise
+        stats.times['set_state'] += time.perf_counter() - tic
+        next_seeds = self.seed_generator(common_seeds)
+
+        action_indices = list(stats.timed(self.action_space.indices(),
+                                          'enumeration'))
+        stats.num_actions = len(action_indices)
+
+        if num_samples is not None:
+            results = self.worker_pool.sample(
+                action_indices, num_samples,
+                [next_seeds(action_index, num_samples)
+                 for action_index in action_indices], stats)
+            choice, value = min(results, key=lambda x: x[1])
+            action = self.action_space.action(choice)
+            self.advance(action)
+            self.finish_stats(action, start_time)
+            return action
+
+        # anytime search, each round of the race is one batch for the pool.
+        # The actions race in a random order, as in choose.
+        self.rng.shuffle(action_indices)
+        position = {action_index: i
+                    for i, action_index in enumerate(action_indices)}
+
+        # a round is sent to the pool num_processes actions at a time, so
+        # that it stops soon after the deadline
+        def sample_round(indices, max_rollouts, deadline):
+            indices = indices[:max_rollouts]
+            results = []
+            for start in range(0, len(indices), num_processes):
+                if deadline is not None and time.perf_counter() >= deadline:
+                    break
+                batch = [action_indices[i]
+                         for i in indices[start:start + num_processes]]
+                results.extend(self.worker_pool.sample(
+                    batch, 1, [next_seeds(action_index, 1)
+                               for action_index in batch], stats))
+            return [(position[action_index], score)
+                    for action_index, score in results]
+
+        choice = self.race(len(action_indices), sample_round, time_budget,
+                           max_rollouts)
+        action = self.action_space.action(action_indices[choice])
+        self.advance(action)
+        self.finish_stats(action, start_time)
         # self.print_turn_summary(starting_turn=self.turn_count-1)
+        return action
+
+    # Whether there is a choice to make besides the colonist distribution:
+    # the research queue is empty or a colony's build queue is free (or holds
+    # housing, trade goods or stored production, which can be replaced at any
+    # turn).
+    def decision_pending(self):
+        return ((self.research_queue is None
+                 and len(self.available_tech_fields) > 0)
+                or any(colony.build_queue in ['tradeGoods', 'housing',
+                                              'storeProduction', None]
+                       for colony in self.colonies))
+
+    # Plays the turns until the next decision or event (see
+    # Game.quiet_turns) in one step, keeping the build queues, colonist
+    # distributions and research. Returns the number of turns played.
+    def fast_forward(self, max_turns=None):
+        if self.decision_pending():
+            return 0
+
+        num_turns = Game.fast_forward(self, max_turns)
+        if num_turns > 0:
+            # the tree was grown for the current turn
+            self.search_root = None
+
+            # purchase costs depend on stored production and the reserve
+            self.action_space = ActionSpace(self)
+        return num_turns
+
+    def close_pool(self):
+        if self.worker_pool is not None:
+            self.worker_pool.close()
+            self.worker_pool = None
 
     def is_finished(self):
         research_complete = (len(self.available_tech_fields) == 0)
@@ -217,13 +718,10 @@ class MonteCarloTreeSearch(Game):
         pop_complete = all(colony.current_population == colony.max_population
                            for colony in self.colonies)
 
-        final_buildings = {'tradeGoods', 'housing', 'freighterFleet',
-                           'pollutionProcessor', 'atmosphereRenewer',
-                           'storeProduction'}
-
+        # no colony has an available building outside final_buildings
         buildings_complete = all(
-            set(colony.available_buildings).issubset(final_buildings) for colony in
-            self.colonies)
+            self.buildings.mask & ~colony.buildings.mask
+            & ~self.final_buildings == 0 for colony in self.colonies)
 
         return (research_complete and pop_complete
                 and buildings_complete and climate_complete)
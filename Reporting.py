@@ -0,0 +1,49 @@
+from tabulate import tabulate
+
+# Text reports of games and colonies. Game and Colony import this module
+# when a report is asked for, the engine itself doesn't need tabulate.
+
+
+def print_turn_summary(game, starting_turn=0):
+    if game.history is None:
+        raise ValueError('the game was created with record_history=False')
+
+    col_headers = ['farmers', 'net food', 'workers', 'prod.', 'scient.',
+                   'rp', 'building', 'progress', 'net bc', 'pop',
+                   'climate', 'pop_max']
+
+    game_headers = ['net food', 'rp', 'cum_rp', 'bc', 'reserve', 'pop',
+                    'researching', 'food freighters', 'num freighters']
+
+    for turn in range(starting_turn, len(game.history)):
+        print('turn:', turn)
+        print()
+        print(tabulate(game.history.colony_rows(turn),
+                       headers=col_headers, tablefmt='simple'))
+        print()
+        print(tabulate([game.history.game_row(turn)],
+                       headers=game_headers, tablefmt='simple'))
+        print()
+        print()
+
+
+def report_game(game):
+    print(f'turn_count: {game.turn_count}')
+    print('reserve:', game.reserve)
+    print('income:', game.bc)
+    print('population:', game.population)
+    print(f'food_freighters, num_freighters: '
+          f'{game.food_freighters},{game.total_freighters}')
+    print('food:', game.food)
+    print('research:', game.rp)
+
+
+def report_colony(colony):
+    print(f'name: {colony.name}')
+    print(f'net bc: {colony.bc}')
+    print(f'farmers: {colony.num_farmers}, net food: {colony.food}')
+    print(f'workers: {colony.num_workers}, production: {colony.production}')
+    print(f'scientists: {colony.num_scientists}, rp: {colony.rp}')
+    print(f'building: {colony.build_queue}')
+    print(f'raw_pop: {colony.raw_population}')
+    print(f'pop_increment: {colony.population_increment}')
@@ -0,0 +1,93 @@
+from BuildingDataDictionary import building_data
+from EconomyTables import stat_table
+
+# Rollout policies choose the next action of a game during the rollouts of
+# MonteCarloTreeSearch. A policy is called with the game and returns an
+# action for MonteCarloTreeSearch.advance. Policies only look at the game's
+# action space and colonist distributions, which are computed anyway, so
+# they don't enumerate any list of actions. Random choices are drawn from
+# the game's random number generator, so rollouts of a seeded game are
+# reproducible.
+
+# build queue choices that don't bring the game closer to being finished
+# (see MonteCarloTreeSearch.is_finished)
+optional_buildings = ['tradeGoods', 'housing', 'freighterFleet',
+                      'pollutionProcessor', 'atmosphereRenewer',
+                      'storeProduction']
+
+
+class RandomPolicy:
+    # uniformly random action
+    def __call__(self, game):
+        return game.action_space.sample(game.rng)
+
+
+class CheapestBuildingPolicy(RandomPolicy):
+    # Every colony builds the cheapest building it still needs, or housing
+    # if there is none. Nothing is purchased. Colonist distribution and
+    # research are random.
+    def __call__(self, game):
+        distribution = game.rng.choice(game.col_distributions_list)
+        research = game.rng.choice(game.res_choices_list)
+        return (self.cheapest_buildings(game), ()), distribution, research
+
+    @staticmethod
+    def cheapest_buildings(game):
+        buildings = []
+        for colony, choices in zip(game.colonies,
+                                   game.action_space.building_choices):
+            costs = {}
+            for building in choices:
+                if building == 'terraforming':
+                    costs[building] = 250 * (1 + colony.terraform_count)
+                elif building not in optional_buildings:
+                    costs[building] = building_data[building].cost
+
+            if len(costs) > 0:
+                buildings.append(min(costs, key=costs.get))
+            elif 'housing' in choices:
+                buildings.append('housing')
+            else:
+                buildings.append(choices[0])
+
+        return tuple(buildings)
+
+
+class MaxResearchPolicy(RandomPolicy):
+    # Colonists are distributed to maximize research among the
+    # distributions that don't result in starvation. Buildings, purchases
+    # and research are random.
+    def __call__(self, game):
+        buildings, _, research = game.action_space.sample(game.rng)
+        return buildings, self.max_research_distribution(game), research
+
+    @staticmethod
+    def max_research_distribution(game):
+        # research points of each colony as a function of its scientists
+        rp_tables = [stat_table(colony, 'rp') for colony in game.colonies]
+
+        return max(game.col_distributions_list,
+                   key=lambda distribution: sum(
+                       table[scientists] for table, (_, _, scientists)
+                       in zip(rp_tables, distribution)))
+
+
+class GreedyPolicy(CheapestBuildingPolicy, MaxResearchPolicy):
+    # cheapest buildings and the distribution maximizing research
+    def __call__(self, game):
+        research = game.rng.choice(game.res_choices_list)
+        return ((self.cheapest_buildings(game), ()),
+                self.max_research_distribution(game), research)
+
+
+class EpsilonGreedyPolicy(RandomPolicy):
+    # follows the greedy policy, except for a random action with probability
+    # epsilon
+    def __init__(self, epsilon=.1, greedy=None):
+        self.epsilon = epsilon
+        self.greedy = GreedyPolicy() if greedy is None else greedy
+
+    def __call__(self, game):
+        if game.rng.random() < self.epsilon:
+            return RandomPolicy.__call__(self, game)
+        return self.greedy(game)
@@ -0,0 +1,141 @@
+from TechTree import tree, achievements
+import marshal
+import os
+
+# The rules of the game compiled into flat tables indexed by integer ids:
+# buildings by their position in building_names (the bit of BuildingSet),
+# achievements by their position in achievement_names (the bit of
+# AchievementSet) and research levels by their field and position in the
+# field. The tables are compiled from BuildingData and TechTree and cached
+# in a binary file next to BuildingData, which is rebuilt when either of
+# them changes.
+data_directory = os.path.dirname(os.path.abspath(__file__))
+building_data_path = os.path.join(data_directory, 'BuildingData')
+tech_tree_path = os.path.join(data_directory, 'TechTree.py')
+cache_path = building_data_path + '.cache'
+cache_version = 3
+
+# The tech tree is the one of a creative race, which learns every
+# technology of a research level. A race's research bonus is added to the
+# base rp per scientist.
+base_rp_per_scientist = 3
+
+# research and tax bonus of each government, and the achievement that
+# improves it together with the improved bonus
+governments = {'democracy': (.5, 'federation', .75)}
+
+
+def parse_building_data(path):
+    buildings = []
+    with open(path) as file:
+        for line in file:
+            if line[0] != '#' and line.strip():
+                name, cost, maintenance = line.split()
+                buildings.append((name, int(cost), int(maintenance)))
+
+    # housing and trade goods are never completed
+    buildings.append(('housing', float('inf'), 0))
+    buildings.append(('tradeGoods', float('inf'), 0))
+    return buildings
+
+
+def compile_tables():
+    buildings = parse_building_data(building_data_path)
+    building_names = [name for name, _, _ in buildings]
+    building_bits = {name: 1 << i for i, name in enumerate(building_names)}
+    achievement_bits = {name: 1 << i for i, name in enumerate(achievements)}
+
+    tables = {
+        'building_names': building_names,
+        'building_cost': [cost for _, cost, _ in buildings],
+        'building_maintenance': [maintenance
+                                 for _, _, maintenance in buildings],
+        'achievement_names': list(achievements),
+        'field_names': list(tree),
+        'level_buildings': {}, 'level_achievements': {},
+        'research_cost': {}
+    }
+
+    for field, levels in tree.items():
+        tables['level_buildings'][field] = [
+            sum(building_bits[b] for b in level.buildings)
+            for level in levels]
+        tables['level_achievements'][field] = [
+            sum(achievement_bits[a] for a in level.achievements)
+            for level in levels]
+
+        # stored rp needed to finish each level
+        tables['research_cost'][field] = [int(1.5 * level.rp_cost)
+                                          for level in levels]
+
+    return tables
+
+
+def source_stamp():
+    return tuple((os.stat(path).st_mtime_ns, os.stat(path).st_size)
+                 for path in (building_data_path, tech_tree_path))
+
+
+# The compiled tables, read from the cache if it is up to date. A cache that
+# can't be written (read-only directory, ...) is skipped.
+def load_tables():
+    stamp = source_stamp()
+    try:
+        with open(cache_path, 'rb') as file:
+            version, cached_stamp, tables = marshal.load(file)
+        if version == cache_version and cached_stamp == stamp:
+            return tables
+    except (OSError, EOFError, ValueError, TypeError):
+        pass
+
+    tables = compile_tables()
+    temporary_path = '{}.{}.tmp'.format(cache_path, os.getpid())
+    try:
+        with open(temporary_path, 'wb') as file:
+            marshal.dump((cache_version, stamp, tables), file)
+        os.replace(temporary_path, cache_path)
+    except OSError:
+        pass
+    return tables
+
+
+tables = load_tables()
+
+
+class Ruleset:
+    def __init__(self, research_bonus=2, government='democracy'):
+        if government not in governments:
+            raise ValueError('unsupported government {}, the supported '
+                             'governments are {}'
+                             .format(government, list(governments)))
+
+        self.research_bonus = research_bonus
+        self.government = government
+        self.rp_multiplier = base_rp_per_scientist + research_bonus
+        (self.government_bonus, self.improved_government,
+         self.improved_government_bonus) = governments[government]
+
+        # masks of the buildings and achievements of each research level,
+        # by field and position, and stored rp needed to finish it
+        self.level_buildings = tables['level_buildings']
+        self.level_achievements = tables['level_achievements']
+        self.research_cost = tables['research_cost']
+
+    # copies sent to other processes are rebuilt from their cached tables
+    def __reduce__(self):
+        return ruleset, (self.research_bonus, self.government)
+
+
+rulesets = {}
+
+
+# the ruleset of a race with the given research bonus and government
+def ruleset(research_bonus=2, government='democracy'):
+    key = (research_bonus, government)
+    if key not in rulesets:
+        rulesets[key] = Ruleset(research_bonus, government)
+    return rulesets[key]
+
+
+# creative, +2 research, democratic
+default_ruleset = ruleset()
@@ -0,0 +1,23 @@
+class SearchNode:
+    def __init__(self):
+        # number of rollouts that passed through this node, and the sum of
+        # their final turn counts and of their squares
+        self.visits = 0
+        self.value_sum = 0
+        self.value_square_sum = 0
+
+        # child nodes keyed by the action that leads to them
+        self.children = {}
+
+        # actions that have not been expanded yet. This list is computed the
+        # first time the node is expanded, so leaves don't pay for it.
+        self.untried_actions = None
+
+    @property
+    def value(self):
+        return self.value_sum / self.visits
+
+    def update(self, score):
+        self.visits += 1
+        self.value_sum += score
+        self.value_square_sum += score * score
@@ -0,0 +1,163 @@
+from math import sqrt
+from statistics import median
+import json
+import time
+
+# Statistics of one decision of MonteCarloTreeSearch: the actions compared,
+# the rollouts run and where the time went. The search keeps the
+# statistics of its last decision in game.search_stats, and writes them to
+# game.stats_log, if any, as one JSON line per decision.
+#
+# The times are summed over the processes of choose_parallel, so they can
+# add up to more than the wall time of the decision:
+#   enumeration  computing the actions of a state (action lists and the
+#                action space, after every advance) and iterating over them
+#   clone        copying the game for rollouts
+#   advance      applying actions and playing turns, fast_forward included
+#   is_finished  checking whether rollouts are finished
+#   policy       choosing the actions of rollouts
+#   set_state    sending the game to the worker processes
+time_names = ['enumeration', 'clone', 'advance', 'is_finished', 'policy',
+              'set_state']
+
+
+# rollout scores (final turn counts) of one action
+class ActionStats:
+    def __init__(self, count=0, total=0, square_total=0):
+        self.count = count
+        self.total = total
+        self.square_total = square_total
+
+    def add(self, score):
+        self.count += 1
+        self.total += score
+        self.square_total += score * score
+
+    def merge(self, other):
+        self.count += other.count
+        self.total += other.total
+        self.square_total += other.square_total
+
+    @property
+    def mean(self):
+        return self.total / self.count
+
+    # sample variance, None for less than two scores
+    @property
+    def variance(self):
+        if self.count < 2:
+            return None
+        return max(0., (self.square_total - self.total * self.total
+                        / self.count) / (self.count - 1))
+
+    # normal approximation of the confidence interval of the mean, z = 1.96
+    # for 95%
+    def confidence_interval(self, z=1.96):
+        if self.count < 2:
+            return None
+        radius = z * sqrt(self.variance / self.count)
+        return self.mean - radius, self.mean + radius
+
+
+class SearchStats:
+    def __init__(self, search=None, turn=None, num_processes=1):
+        self.search = search
+        self.turn = turn
+        self.num_processes = num_processes
+        self.num_actions = 0
+        self.choice = None
+        self.wall_time = 0.
+        self.times = dict.fromkeys(time_names, 0.)
+        self.rollout_lengths = []
+
+        # ActionStats keyed by action
+        self.actions = {}
+
+    def add_score(self, action, score):
+        if action not in self.actions:
+            self.actions[action] = ActionStats()
+        self.actions[action].add(score)
+
+    def merge(self, other):
+        for name, seconds in other.times.items():
+            self.times[name] += seconds
+        self.rollout_lengths.extend(other.rollout_lengths)
+        for action, action_stats in other.actions.items():
+            if action not in self.actions:
+                self.actions[action] = ActionStats()
+            self.actions[action].merge(action_stats)
+
+    # yields the items of iterable, adding the time spent producing them to
+    # the time called name
+    def timed(self, iterable, name):
+        iterator = iter(iterable)
+        end = object()
+        while True:
+            tic = time.perf_counter()
+            item = next(iterator, end)
+            self.times[name] += time.perf_counter() - tic
+            if item is end:
+                return
+            yield item
+
+    @property
+    def num_rollouts(self):
+        return len(self.rollout_lengths)
+
+    @property
+    def rollouts_per_second(self):
+        if self.wall_time == 0:
+            return None
+        return self.num_rollouts / self.wall_time
+
+    # minimum, median, mean and maximum number of turns of the rollouts
+    def rollout_length_summary(self):
+        lengths = self.rollout_lengths
+        if len(lengths) == 0:
+            return None
+        return {'min': min(lengths), 'median': median(lengths),
+                'mean': sum(lengths) / len(lengths), 'max': max(lengths)}
+
+    # (action, ActionStats) pairs, best (lowest mean) first
+    def ranked_actions(self):
+        return sorted(self.actions.items(), key=lambda item: item[1].mean)
+
+    def to_dict(self, z=1.96):
+        return {
+            'turn': self.turn,
+            'search': self.search,
+            'num_processes': self.num_processes,
+            'num_actions': self.num_actions,
+            'num_rollouts': self.num_rollouts,
+            'wall_time': self.wall_time,
+            'rollouts_per_second': self.rollouts_per_second,
+            'times': self.times,
+            'rollout_lengths': self.rollout_length_summary(),
+            'choice': self.choice,
+            'actions': [{'action': action, 'count': stats.count,
+                         'mean': stats.mean, 'variance': stats.variance,
+                         'confidence_interval':
+                             stats.confidence_interval(z)}
+                        for action, stats in self.ranked_actions()],
+        }
+
+
+# Appends the statistics of each decision to a file, one JSON object per
+# line
+class SearchStatsLog:
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'a')
+
+    def write(self, stats):
+        self.file.write(json.dumps(stats.to_dict()) + '\n')
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -6,7 +6,7 @@ level_to_rp_cost = {
 }
 
 ResearchLevel = namedtuple(
-    'ResLevel',
+    'ResearchLevel',
     ['buildings', 'achievements', 'field', 'level', 'rp_cost']
 )
 
@@ -91,3 +91,9 @@ force_fields = [
 
 tree = {'construction': construction, 'chemistry': chemistry,
         'computers': computers, 'biology': biology, 'sociology': sociology}
+
+# achievements of the tree, in the order of their AchievementSet bits
+achievements = ['advancedCityPlanning', 'microliteConstruction',
+                'nanoDisassemblers', 'federation', 'currencyExchange',
+                'realityNetwork', 'microbiotics', 'universalAntidote',
+                'heightenedIntelligence', 'biomorphicFungi']
@@ -0,0 +1,126 @@
+from TurnHistoryClass import colony_dtype, game_dtype, colony_record, \
+    game_record
+import numpy as np
+import os
+import struct
+
+# A trajectory log file is a 16 byte header followed by fixed-width records,
+# one per turn played. The header holds a magic string, the format version,
+# the number of colonies and the size of a record. Each record holds the
+# trajectory id, the turn count, which colonies bought production and the
+# game and colony summaries of TurnHistory, taken once
+# the turn's action is set and before the turn is played, so the buildings,
+# colonist distributions and research of the action are part of it. All
+# numbers are little-endian.
+magic = b'MOO2TRAJ'
+version = 1
+header_format = '<8sHHI'
+header_size = struct.calcsize(header_format)
+
+
+def record_dtype(num_colonies):
+    return np.dtype([
+        ('trajectory', '<u8'), ('turn', '<u4'),
+        ('purchased', '?', (num_colonies,)),
+        ('game', game_dtype.newbyteorder('<')),
+        ('colonies', colony_dtype.newbyteorder('<'), (num_colonies,))
+    ])
+
+
+def read_header(file):
+    data = file.read(header_size)
+    if len(data) < header_size:
+        raise ValueError('not a trajectory log: the header is incomplete')
+
+    file_magic, file_version, num_colonies, record_size = struct.unpack(
+        header_format, data)
+    if file_magic != magic:
+        raise ValueError('not a trajectory log')
+    if file_version != version:
+        raise ValueError('unsupported trajectory log version {}'
+                         .format(file_version))
+    if record_size != record_dtype(num_colonies).itemsize:
+        raise ValueError('the record size of the trajectory log does not '
+                         'match its number of colonies')
+    return num_colonies
+
+
+# Append-only writer of a trajectory log. Records are buffered and written
+# with one unbuffered write per flush, so whole records are appended even
+# when several processes write to the same file. Records of different
+# trajectories may be interleaved, and are told apart by their trajectory
+# ids.
+class TrajectoryLog:
+    def __init__(self, path, num_colonies, buffer_size=1024):
+        self.path = path
+        self.num_colonies = num_colonies
+        self.dtype = record_dtype(num_colonies)
+        self.buffer = np.zeros(buffer_size, dtype=self.dtype)
+        self.num_buffered = 0
+
+        self.file = open(path, 'ab', buffering=0)
+        if self.file.tell() == 0:
+            self.file.write(struct.pack(header_format, magic, version,
+                                        num_colonies, self.dtype.itemsize))
+        else:
+            with open(path, 'rb') as file:
+                if read_header(file) != num_colonies:
+                    self.file.close()
+                    raise ValueError('the trajectory log has a different '
+                                     'number of colonies')
+
+    # record the turn about to be played with the given production purchases
+    def record(self, game, trajectory, purchases=()):
+        if self.num_buffered == len(self.buffer):
+            self.flush()
+
+        record = self.buffer[self.num_buffered]
+        record['trajectory'] = trajectory
+        record['turn'] = game.turn_count
+        record['purchased'] = False
+        record['purchased'][list(purchases)] = True
+        record['game'] = game_record(game)
+        for i, colony in enumerate(game.colonies):
+            record['colonies'][i] = colony_record(colony)
+
+        self.num_buffered += 1
+
+    def flush(self):
+        if self.num_buffered > 0:
+            self.file.write(self.buffer[:self.num_buffered].tobytes())
+            self.num_buffered = 0
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    # A copy sent to another process appends to the same file. Records
+    # still buffered stay with the original.
+    def __reduce__(self):
+        return TrajectoryLog, (self.path, self.num_colonies,
+                               len(self.buffer))
+
+
+# The records of a trajectory log as a read-only structured array mapped
+# from the file. A record cut short by an interrupted write is left out.
+def read_trajectory_log(path):
+    with open(path, 'rb') as file:
+        num_colonies = read_header(file)
+
+    dtype = record_dtype(num_colonies)
+    num_records = (os.path.getsize(path) - header_size) // dtype.itemsize
+    if num_records == 0:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode='r', offset=header_size,
+                     shape=(num_records,))
+
+
+# the records of one trajectory, in the order they were played
+def trajectory_records(records, trajectory):
+    return records[records['trajectory'] == trajectory]
@@ -0,0 +1,33 @@
+from collections import OrderedDict
+
+
+# Bounded table of value estimates keyed by game state hash. Values are the
+# number of turns that were still needed to finish the game from the state,
+# so they can be shared by equivalent states reached on different turns.
+# When the table is full the least recently used entry is dropped.
+class TranspositionTable:
+    def __init__(self, max_entries=100000):
+        self.max_entries = max_entries
+
+        # state hash -> [visits, sum of remaining turns]
+        self.entries = OrderedDict()
+
+    def __len__(self):
+        return len(self.entries)
+
+    # returns the pair [visits, sum of remaining turns] or None
+    def lookup(self, state_hash):
+        entry = self.entries.get(state_hash)
+        if entry is not None:
+            self.entries.move_to_end(state_hash)
+        return entry
+
+    def update(self, state_hash, remaining_turns):
+        entry = self.lookup(state_hash)
+        if entry is None:
+            self.entries[state_hash] = [1, remaining_turns]
+            if len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        else:
+            entry[0] += 1
+            entry[1] += remaining_turns
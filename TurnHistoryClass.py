@@ -0,0 +1,113 @@
+from ColonyClass import Colony
+from FlagSetClass import BuildingSet
+from BuildingDataDictionary import building_data
+from TechTree import tree
+import numpy as np
+
+# names stored in the history as their index in these lists
+climate_names = list(Colony.population_multiplier_map)
+field_names = list(tree)
+
+colony_dtype = np.dtype([
+    ('farmers', np.int32), ('food', np.int32), ('workers', np.int32),
+    ('production', np.int32), ('scientists', np.int32), ('rp', np.int32),
+    ('building', np.int16), ('stored_production', np.int64),
+    ('building_cost', np.float64), ('bc', np.int32),
+    ('population', np.int32), ('climate', np.int8),
+    ('max_population', np.int32)
+])
+
+game_dtype = np.dtype([
+    ('food', np.int32), ('rp', np.int32), ('cumulative_rp', np.int64),
+    ('bc', np.int32), ('reserve', np.int64), ('population', np.int32),
+    ('research_field', np.int8), ('research_level', np.int16),
+    ('food_freighters', np.int32), ('total_freighters', np.int32)
+])
+
+
+# values of the fields of colony_dtype and game_dtype
+def colony_record(colony):
+    if colony.build_queue is None:
+        building, building_cost = -1, np.nan
+    else:
+        building = BuildingSet.names.index(colony.build_queue)
+        building_cost = building_data[colony.build_queue].cost
+
+    return (colony.num_farmers, colony.food, colony.num_workers,
+            colony.production, colony.num_scientists, colony.rp, building,
+            colony.stored_production, building_cost, colony.bc,
+            colony.current_population, climate_names.index(colony.climate),
+            colony.max_population)
+
+
+def game_record(game):
+    if game.research_queue is not None:
+        research_field = field_names.index(game.research_queue.field)
+        research_level = game.research_queue.level
+    else:
+        research_field, research_level = -1, -1
+
+    return (game.food, game.rp, game.cumulative_rp, game.bc, game.reserve,
+            game.population, research_field, research_level,
+            game.food_freighters, game.total_freighters)
+
+
+# Summary of every turn of a game, stored in columns. colonies[turn, i] is
+# the record of colony i and games[turn] the record of the game at the
+# start of the turn. Buildings, climates and research fields are stored as
+# indices (-1 for none). The arrays are preallocated and doubled when full.
+class TurnHistory:
+    def __init__(self, num_colonies, capacity=64):
+        self.num_turns = 0
+        self.colonies = np.zeros((capacity, num_colonies), dtype=colony_dtype)
+        self.games = np.zeros(capacity, dtype=game_dtype)
+
+    def __len__(self):
+        return self.num_turns
+
+    def record(self, game):
+        if self.num_turns == len(self.games):
+            self.colonies = np.concatenate(
+                [self.colonies, np.zeros_like(self.colonies)])
+            self.games = np.concatenate([self.games,
+                                         np.zeros_like(self.games)])
+
+        for i, colony in enumerate(game.colonies):
+            self.colonies[self.num_turns, i] = colony_record(colony)
+        self.games[self.num_turns] = game_record(game)
+
+        self.num_turns += 1
+
+    # rows of Game.print_turn_summary's tables for a turn
+    def colony_rows(self, turn):
+        rows = []
+        for record in self.colonies[turn]:
+            if record['building'] < 0:
+                building, progress = None, str(record['stored_production'])
+            else:
+                building = BuildingSet.names[record['building']]
+                cost = record['building_cost']
+                progress = '{}/{}'.format(
+                    record['stored_production'],
+                    int(cost) if np.isfinite(cost) else cost)
+
+            rows.append([record['farmers'], record['food'],
+                         record['workers'], record['production'],
+                         record['scientists'], record['rp'], building,
+                         progress, record['bc'], record['population'],
+                         climate_names[record['climate']],
+                         record['max_population']])
+        return rows
+
+    def game_row(self, turn):
+        record = self.games[turn]
+        if record['research_field'] < 0:
+            research = 'None'
+        else:
+            research = (field_names[record['research_field']]
+                        + str(record['research_level']))
+
+        return [record['food'], record['rp'], record['cumulative_rp'],
+                record['bc'], record['reserve'], record['population'],
+                research, record['food_freighters'],
+                record['total_freighters']]
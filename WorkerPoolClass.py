@@ -0,0 +1,85 @@
+from multiprocessing import Pool, Barrier
+from itertools import repeat
+from GameSerialization import dumps, loads
+from SearchStatsClass import SearchStats
+import pickle
+
+# Each worker process keeps its own copy of the game being searched. The
+# copy is updated once per turn by WorkerPool.set_state, after which tasks
+# only carry indices into the game's action space. The first state sent is
+# a pickle of the whole game, which carries its configuration (rollout
+# policy, rollout log, ...). Later ones are in the compact format of
+# GameSerialization and are loaded into the existing copy.
+worker_game = None
+worker_barrier = None
+
+
+def init_worker(barrier):
+    global worker_barrier
+    worker_barrier = barrier
+
+
+def load_state(state, is_pickle):
+    global worker_game
+    try:
+        if is_pickle:
+            worker_game = pickle.loads(state)
+        else:
+            loads(state, worker_game)
+    except BaseException:
+        # The other workers would wait at the barrier forever. Aborting it
+        # makes them raise BrokenBarrierError, so set_state fails instead
+        # of hanging.
+        worker_barrier.abort()
+        raise
+
+    # Block until every worker has loaded the state. This guarantees that
+    # each worker takes exactly one of the load_state tasks.
+    worker_barrier.wait()
+
+
+# the rollouts of each task are counted in their own SearchStats, which is
+# sent back with the result
+def sample_action(action_index, num_samples, seeds):
+    worker_game.search_stats = SearchStats()
+    action = worker_game.action_space.action(action_index)
+    _, value = worker_game.sample(action, num_samples, seeds)
+    return action_index, value, worker_game.search_stats
+
+
+# Pool of worker processes that lives across turns
+class WorkerPool:
+    def __init__(self, num_processes):
+        self.num_processes = num_processes
+        self.pool = Pool(processes=num_processes, initializer=init_worker,
+                         initargs=(Barrier(num_processes),))
+        self.game_sent = False
+
+    # Send the current game state to every worker. If a worker fails to load
+    # it, the error is raised and the pool can't be used any more.
+    def set_state(self, game):
+        is_pickle = not self.game_sent
+        state = pickle.dumps(game) if is_pickle else dumps(game)
+        self.pool.starmap(load_state,
+                          [(state, is_pickle)] * self.num_processes,
+                          chunksize=1)
+        self.game_sent = True
+
+    # Returns a list of pairs of the form
+    # (action_index, sample(action, num_samples, seeds)). seeds is a list
+    # with the rollout seeds of each action. The copies of the game in the
+    # workers have the same random number generator, so the seeds have to be
+    # drawn by the caller for the rollouts to be independent. The statistics
+    # of the rollouts are merged into stats, if given.
+    def sample(self, action_indices, num_samples, seeds, stats=None):
+        results = self.pool.starmap(sample_action,
+                                    zip(action_indices, repeat(num_samples),
+                                        seeds))
+        if stats is not None:
+            for _, _, task_stats in results:
+                stats.merge(task_stats)
+        return [(action_index, value) for action_index, value, _ in results]
+
+    def close(self):
+        self.pool.close()
+        self.pool.join()
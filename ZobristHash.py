@@ -0,0 +1,37 @@
+from hashlib import blake2b
+
+# Zobrist hashing of game states. The hash of a state is the XOR of a
+# 64-bit key for every feature of the state (a building being built, the
+# value of stored production, ...), so when a feature changes the hash is
+# updated by XOR-ing out the old key and XOR-ing in the new one.
+
+MASK = (1 << 64) - 1
+
+feature_keys = {}
+
+
+# Random looking 64-bit key of a feature. Keys are derived from the
+# feature's repr, so they are the same in every process and features don't
+# have to be hashable.
+def feature_key(feature):
+    text = repr(feature)
+    key = feature_keys.get(text)
+    if key is None:
+        digest = blake2b(text.encode(), digest_size=8).digest()
+        key = feature_keys[text] = int.from_bytes(digest, 'little')
+    return key
+
+
+# splitmix64 finalizer
+def mix(x):
+    x = (x + 0x9E3779B97F4A7C15) & MASK
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & MASK
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & MASK
+    return x ^ (x >> 31)
+
+
+# key of a feature taking the given value
+def value_key(feature, value):
+    if isinstance(value, int):
+        return mix(feature_key(feature) ^ (value & MASK))
+    return feature_key((feature, value))
@@ -0,0 +1,223 @@
+from ColonyClass import Planet, Colony
+from GameClass import Game
+from MonteCarloTreeSearchClass import MonteCarloTreeSearch
+from itertools import product
+from statistics import median
+import EconomyTables
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+# Benchmarks of the engine and search hot paths on fixed scenarios. Each
+# benchmark reports the median time of a call over a few repeats, the
+# results are saved as JSON and can be compared with an earlier run:
+#
+#     python benchmarks.py --output new.json --compare old.json
+#
+# All games are seeded, so the same calls are timed in every run.
+
+starting_tech = [('construction', 6), ('chemistry', 2), ('sociology', 2),
+                 ('computers', 3), ('biology', 2)]
+
+
+# the colonies of flat_monte-carlo_search.py
+def driver_colony(extra_buildings=()):
+    planet = Planet('huge', 'abundant', 'normal', 'terran')
+    return Colony(planet, 'colony1', 2, 2, 2,
+                  ['automatedFactory', 'hydroponicFarm', 'biospheres',
+                   *extra_buildings])
+
+
+def flat_scenario():
+    colonies = [driver_colony(['researchLab']), driver_colony(),
+                driver_colony()]
+    return MonteCarloTreeSearch(starting_tech, colonies, seed=0)
+
+
+# flat_monte-carlo_search_parallel.py and uct_monte-carlo_search.py
+def single_colony_scenario():
+    return MonteCarloTreeSearch(starting_tech,
+                                [driver_colony(['researchLab'])], seed=0)
+
+
+def gui_example_scenario():
+    c1 = Colony(Planet('large', 'abundant', 'normal', 'tundra'), 'Ecber II',
+                2, 1, 1, ['hydroponicFarm', 'marineBarracks'])
+    c2 = Colony(Planet('large', 'abundant', 'normal', 'desert'), 'Fahd II',
+                2, 1, 1, ['marineBarracks', 'hydroponicFarm'])
+    c3 = Colony(Planet('medium', 'abundant', 'normal', 'terran'),
+                'Mentar IV', 2, 3, 3,
+                ['automatedFactory', 'hydroponicFarm', 'biospheres',
+                 'marineBarracks', 'soilEnrichment'])
+    positions = [('construction', 6), ('chemistry', 3), ('sociology', 2),
+                 ('computers', 3), ('biology', 2)]
+    return MonteCarloTreeSearch(positions, [c1, c2, c3], reserve=200,
+                                seed=0)
+
+
+scenarios = {'flat': flat_scenario, 'single_colony': single_colony_scenario,
+             'gui_example': gui_example_scenario}
+
+
+# Median, minimum and maximum time of a call of function, each repeat
+# timing number calls. setup is called before each call, outside the
+# timing.
+def time_calls(function, number, repeat, setup=None):
+    times = []
+    for _ in range(repeat):
+        total = 0.
+        for _ in range(number):
+            if setup is not None:
+                setup()
+            tic = time.perf_counter()
+            function()
+            total += time.perf_counter() - tic
+        times.append(total / number)
+    return {'seconds': median(times), 'min': min(times), 'max': max(times),
+            'calls': number * repeat}
+
+
+def colony_stats(game, repeat):
+    results = {}
+    colony = game.colonies[0]
+    for stat in ['food', 'production', 'rp', 'bc']:
+        # the stats are cached, the cache is emptied before each call
+        results['colony.' + stat] = time_calls(
+            lambda: getattr(colony, stat), 2000, repeat, colony.invalidate)
+    return results
+
+
+def game_turn(game, repeat):
+    game = game.clone()
+    snapshot = Game.snapshot(game)
+    return {'game.turn': time_calls(lambda: Game.turn(game), 200, repeat,
+                                    lambda: Game.restore(game, snapshot))}
+
+
+def action_enumeration(game, repeat):
+    game = game.clone()
+    choice = next(product(*(colony.building_choices
+                            for colony in game.colonies)))
+    # colonist_distributions reads the colonies' food from the economy
+    # tables, which are built by the first call and cached. The cold timing
+    # empties the cache before each call.
+    return {
+        'colonist_distributions': time_calls(game.colonist_distributions,
+                                             20, repeat),
+        'colonist_distributions.cold': time_calls(
+            game.colonist_distributions, 20, repeat,
+            EconomyTables.tables_cache.clear),
+        'purchase_choices': time_calls(lambda: game.purchase_choices(choice),
+                                       200, repeat),
+        'building_choices': time_calls(game.building_choices, 5, repeat),
+    }
+
+
+def rollout(game, repeat):
+    turns = []
+
+    def run():
+        rollout_game = game.clone()
+        rollout_game.rng.seed(len(turns))
+        turns.append(game.rollout(rollout_game) - game.turn_count)
+
+    result = time_calls(run, 3, repeat)
+    result['turns'] = median(turns)
+    result['turns_per_second'] = result['turns'] / result['seconds']
+    return {'rollout': result}
+
+
+engine_benchmarks = [colony_stats, game_turn, action_enumeration, rollout]
+
+
+# The first decision of the single colony scenario with choose_parallel and
+# one rollout per action. The time includes starting the pool, which is
+# small next to the rollouts.
+def choose_parallel(num_processes, repeat):
+    num_actions = sum(1 for _ in single_colony_scenario().action_space)
+
+    def decide():
+        game = single_colony_scenario()
+        game.choose_parallel(num_processes, num_samples=1)
+        game.close_pool()
+
+    result = time_calls(decide, 1, repeat)
+    result['rollouts_per_second'] = num_actions / result['seconds']
+    return result
+
+
+# time to start a process importing the search, above an empty process
+def import_time(repeat):
+    def run(code):
+        tic = time.perf_counter()
+        subprocess.run([sys.executable, '-c', code], check=True,
+                       cwd=os.path.dirname(os.path.abspath(__file__)))
+        return time.perf_counter() - tic
+
+    empty = median(run('pass') for _ in range(repeat))
+    search = [run('import MonteCarloTreeSearchClass') - empty
+              for _ in range(repeat)]
+    return {'seconds': median(search), 'min': min(search),
+            'max': max(search), 'calls': repeat}
+
+
+def print_comparison(results, previous):
+    for name, result in results.items():
+        if name in previous:
+            ratio = result['seconds'] / previous[name]['seconds']
+            print('{:50} {:12.6f} s  {:6.2f}x previous'.format(
+                name, result['seconds'], ratio))
+        else:
+            print('{:50} {:12.6f} s'.format(name, result['seconds']))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='engine and search '
+                                                 'benchmarks')
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--compare', help='results of an earlier run')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--processes', type=int, nargs='*',
+                        default=[1, 2, 4, 8],
+                        help='numbers of processes of choose_parallel')
+    args = parser.parse_args()
+
+    results = {}
+    for scenario, make_game in scenarios.items():
+        game = make_game()
+        for benchmark in engine_benchmarks:
+            for name, result in benchmark(game, args.repeat).items():
+                results['{}/{}'.format(scenario, name)] = result
+                print(scenario, name, result['seconds'])
+
+    for num_processes in args.processes:
+        name = 'single_colony/choose_parallel/{}'.format(num_processes)
+        results[name] = choose_parallel(num_processes,
+                                        min(args.repeat, 2))
+        print(name, results[name]['seconds'])
+
+    results['import'] = import_time(args.repeat)
+
+    output = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'results': results,
+    }
+    with open(args.output, 'w') as file:
+        json.dump(output, file, indent=2)
+
+    if args.compare is not None:
+        with open(args.compare) as file:
+            previous = json.load(file)['results']
+        print()
+        print_comparison(results, previous)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+from ColonyClass import Planet, Colony
+from MonteCarloTreeSearchClass import MonteCarloTreeSearch
+from Checkpoint import save_checkpoint, load_checkpoint
+from SearchStatsClass import SearchStatsLog
+import argparse
+import time
+
+# Search driver that saves the game, the actions taken and the search
+# statistics to a checkpoint file every few turns. Run it again with
+# --resume to continue from the last checkpoint with the saved settings.
+# The UCT search tree isn't saved, a resumed UCT search starts a new one.
+parser = argparse.ArgumentParser(
+    description='Monte Carlo search with checkpoints')
+parser.add_argument('checkpoint', help='checkpoint file')
+parser.add_argument('--resume', action='store_true',
+                    help='continue the search saved in the checkpoint')
+parser.add_argument('--search', choices=['flat', 'parallel', 'uct'],
+                    default='flat')
+parser.add_argument('--num-samples', type=int, default=1,
+                    help='rollouts per action of the flat searches')
+parser.add_argument('--time-budget', type=float,
+                    help='seconds per turn of an anytime flat search, '
+                         'used instead of --num-samples')
+parser.add_argument('--num-rollouts', type=int, default=100,
+                    help='rollouts per turn of the UCT search')
+parser.add_argument('--num-processes', type=int, default=6)
+parser.add_argument('--every', type=int, default=1,
+                    help='turns between checkpoints')
+parser.add_argument('--seed', type=int)
+parser.add_argument('--stats-log',
+                    help='file the statistics of every decision are '
+                         'appended to, one JSON line per turn')
+args = parser.parse_args()
+
+if args.resume:
+    game, actions, stats, settings = load_checkpoint(args.checkpoint)
+    print('resuming at turn', game.turn_count)
+else:
+    p1 = Planet('huge', 'abundant', 'normal', 'terran')
+    c1 = Colony(p1, 'colony1', 2, 2, 2,
+                ['automatedFactory', 'hydroponicFarm', 'biospheres',
+                 'researchLab']
+                )
+
+    # starting positions for each research field
+    starting_tech = [('construction', 6), ('chemistry', 2), ('sociology', 2),
+                     ('computers', 3), ('biology', 2)]
+
+    game = MonteCarloTreeSearch(starting_tech, [c1], seed=args.seed)
+    actions = []
+    stats = {'search_time': 0., 'turn_times': []}
+    settings = {'search': args.search, 'num_samples': args.num_samples,
+                'time_budget': args.time_budget,
+                'num_rollouts': args.num_rollouts,
+                'num_processes': args.num_processes, 'every': args.every}
+
+if args.stats_log is not None:
+    game.stats_log = SearchStatsLog(args.stats_log)
+
+
+def choose(game):
+    if settings['search'] == 'uct':
+        return game.choose_uct(num_rollouts=settings['num_rollouts'])
+
+    num_samples = (settings['num_samples']
+                   if settings['time_budget'] is None else None)
+    if settings['search'] == 'parallel':
+        return game.choose_parallel(settings['num_processes'],
+                                    num_samples=num_samples,
+                                    time_budget=settings['time_budget'])
+    return game.choose(num_samples=num_samples,
+                       time_budget=settings['time_budget'])
+
+
+try:
+    while not game.is_finished():
+        tic = time.time()
+        actions.append(choose(game))
+        elapsed = time.time() - tic
+        stats['search_time'] += elapsed
+        stats['turn_times'].append(elapsed)
+
+        if len(actions) % settings['every'] == 0:
+            save_checkpoint(args.checkpoint, game, actions, stats, settings)
+finally:
+    game.close_pool()
+    if game.stats_log is not None:
+        game.stats_log.close()
+
+save_checkpoint(args.checkpoint, game, actions, stats, settings)
+print(game.turn_count)
+print(stats['search_time'])
@@ -31,5 +31,7 @@ while not game.is_finished():
     # print(game.turn_count)
     game.choose_parallel(num_processes=6, num_samples=100)
 
+game.close_pool()
+
 toc = time.time()
-print(toc - tic)
\ No newline at end of file
+print(toc - tic)
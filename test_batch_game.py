@@ -0,0 +1,130 @@
+from ColonyClass import Planet, Colony
+from MonteCarloTreeSearchClass import MonteCarloTreeSearch
+from BatchGameClass import (BatchGame, building_index, climate_index,
+                            field_names, NONE)
+import numpy as np
+import random
+
+# BatchGame against the scalar engine: every copy of a batch plays the same
+# random actions as its own MonteCarloTreeSearch and their states are
+# compared after every turn. A copy is compared until its game is finished
+# or sells buildings, which the two engines do with different random
+# numbers.
+
+starting_tech = [('construction', 6), ('chemistry', 2), ('sociology', 2),
+                 ('computers', 3), ('biology', 2)]
+
+
+def make_game():
+    colonies = [
+        Colony(Planet('huge', 'abundant', 'normal', 'terran'), 'a', 2, 2, 2,
+               ['automatedFactory', 'hydroponicFarm', 'biospheres',
+                'researchLab']),
+        Colony(Planet('medium', 'poor', 'heavyG', 'tundra'), 'b', 1, 1, 1,
+               ['hydroponicFarm']),
+        Colony(Planet('large', 'ultraRich', 'lowG', 'desert'), 'c', 1, 1, 1,
+               []),
+    ]
+    return MonteCarloTreeSearch(starting_tech, colonies, seed=0)
+
+
+def colony_state(colony):
+    return (colony.num_farmers, colony.num_workers, colony.num_scientists,
+            colony.current_population, colony.raw_population,
+            colony.stored_production, climate_index[colony.climate],
+            colony.terraform_count, colony.imported_food,
+            NONE if colony.build_queue is None
+            else building_index[colony.build_queue],
+            tuple(colony.buildings.values()), colony.food, colony.production,
+            colony.rp, colony.bc, colony.max_population)
+
+
+def batch_colony_state(batch, copy, j):
+    return (batch.num_farmers[copy, j], batch.num_workers[copy, j],
+            batch.num_scientists[copy, j], batch.current_population[copy, j],
+            batch.raw_population[copy, j], batch.stored_production[copy, j],
+            batch.climate[copy, j], batch.terraform_count[copy, j],
+            batch.imported_food[copy, j], batch.build_queue[copy, j],
+            tuple(batch.buildings[copy, j]), batch.food[copy, j],
+            batch.production[copy, j], batch.rp[copy, j], batch.bc[copy, j],
+            batch.max_population[copy, j])
+
+
+def game_state(game):
+    return (game.stored_rp, game.cumulative_rp, game.reserve,
+            game.turn_count, game.food_freighters, game.total_freighters,
+            tuple(game.tech_tree_positions[field] for field in field_names),
+            tuple(game.buildings.values()), tuple(game.achievements.values()),
+            game.is_finished())
+
+
+def batch_game_state(batch, copy):
+    return (batch.stored_rp[copy], batch.cumulative_rp[copy],
+            batch.reserve[copy], batch.turn_count[copy],
+            batch.food_freighters[copy], batch.total_freighters[copy],
+            tuple(batch.tech_tree_positions[copy]),
+            tuple(batch.game_buildings[copy]),
+            tuple(batch.achievements[copy]), batch.is_finished()[copy])
+
+
+def play_lockstep(seed, num_copies=8, max_turns=400):
+    rng = random.Random(seed)
+    games = [make_game() for _ in range(num_copies)]
+    batch = BatchGame(games[0], num_copies)
+    num_colonies = len(games[0].colonies)
+
+    # copies whose game sold buildings are no longer compared
+    compared = [True] * num_copies
+    for copy, game in enumerate(games):
+        def sell_buildings(game=game, copy=copy):
+            compared[copy] = False
+            MonteCarloTreeSearch.sell_buildings(game)
+        game.sell_buildings = sell_buildings
+
+    compared_turns = 0
+    for _ in range(max_turns):
+        playing = [compared[copy] and not game.is_finished()
+                   for copy, game in enumerate(games)]
+        if not any(playing):
+            break
+
+        build_queue = batch.build_queue.copy()
+        num_farmers = batch.num_farmers.copy()
+        num_workers = batch.num_workers.copy()
+        num_scientists = batch.num_scientists.copy()
+        purchases = np.zeros((num_copies, num_colonies), dtype=bool)
+        research = np.full(num_copies, NONE)
+        for copy, game in enumerate(games):
+            if not playing[copy]:
+                continue
+            action = game.action_space.sample(rng)
+            (buildings, purchased), distribution, field = action
+            build_queue[copy] = [building_index[b] for b in buildings]
+            (num_farmers[copy], num_workers[copy],
+             num_scientists[copy]) = zip(*distribution)
+            purchases[copy, list(purchased)] = True
+            research[copy] = (NONE if field is None
+                              else field_names.index(field))
+            game.advance(action)
+
+        batch.advance(build_queue, num_farmers, num_workers, num_scientists,
+                      purchases, research)
+
+        for copy, game in enumerate(games):
+            if not playing[copy] or not compared[copy]:
+                continue
+            assert game_state(game) == batch_game_state(batch, copy)
+            for j, colony in enumerate(game.colonies):
+                assert colony_state(colony) == batch_colony_state(batch,
+                                                                  copy, j)
+            compared_turns += 1
+
+    return compared_turns, sum(game.is_finished() for game in games)
+
+
+def test_batch_game_matches_scalar_turns():
+    for seed in range(2):
+        compared_turns, finished = play_lockstep(seed)
+        # most copies play whole games without selling buildings
+        assert compared_turns > 1000
+        assert finished > 0
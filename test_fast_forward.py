@@ -0,0 +1,113 @@
+from ColonyClass import Planet, Colony
+from GameClass import Game
+from MonteCarloTreeSearchClass import MonteCarloTreeSearch
+from ActionSpaceClass import ActionSpace
+from TurnHistoryClass import TurnHistory
+import random
+
+# Fast-forwarding against playing the skipped turns one at a time: from
+# the states of seeded random games, one copy is fast-forwarded and
+# another plays the same number of turns with Game.turn, and the two must
+# end in the same state.
+
+starting_tech = [('construction', 6), ('chemistry', 2), ('sociology', 2),
+                 ('computers', 3), ('biology', 2)]
+
+# Climates in which colonies can feed themselves. Random actions can
+# starve an empire of poorer planets, which then has no colonist
+# distribution.
+climates = ['terran', 'arid', 'swamp', 'ocean']
+
+
+def random_game(rng):
+    colonies = []
+    for i in range(rng.randint(1, 4)):
+        planet = Planet(rng.choice(['medium', 'large', 'huge']),
+                        rng.choice(['poor', 'abundant', 'rich']),
+                        rng.choice(['lowG', 'normal', 'heavyG']),
+                        rng.choice(climates))
+        buildings = ['hydroponicFarm', 'automatedFactory',
+                     'biospheres'][:rng.randint(1, 3)]
+        colonies.append(Colony(planet, 'colony{}'.format(i), 2, 2, 2,
+                               buildings))
+    return MonteCarloTreeSearch(starting_tech, colonies,
+                                reserve=rng.choice([0, 200, 1000]),
+                                seed=rng.getrandbits(32))
+
+
+def totals(game):
+    return (game.food, game.rp, game.bc, game.population,
+            dict(game.empire_totals))
+
+
+def assert_same_state(game, other):
+    # pollution_penalty is only set when production is computed
+    for colony in game.colonies + other.colonies:
+        colony.production
+
+    assert Game.snapshot(game) == Game.snapshot(other)
+    assert game.state_hash == other.state_hash
+    assert totals(game) == totals(other)
+    assert game.compute_hash() == game.game_hash
+    assert all(colony.compute_hash() == colony.state_hash
+               for colony in game.colonies)
+
+
+def test_fast_forward_matches_turns():
+    rng = random.Random(0)
+    fast_forwards = skipped_turns = 0
+
+    for _ in range(8):
+        game = random_game(rng)
+        while not game.is_finished() and game.turn_count < 300:
+            game.advance(game.action_space.sample(rng))
+
+            fast = game.clone()
+            stepped = game.clone()
+            if rng.random() < .5:
+                fast.history = TurnHistory(len(fast.colonies))
+                stepped.history = TurnHistory(len(stepped.colonies))
+
+            num_turns = Game.fast_forward(fast,
+                                          rng.choice([None, 3, 50]))
+            for _ in range(num_turns):
+                Game.turn(stepped)
+            assert_same_state(fast, stepped)
+            if fast.history is not None:
+                assert len(fast.history) == len(stepped.history)
+                assert (fast.history.colonies[:num_turns]
+                        == stepped.history.colonies[:num_turns]).all()
+                assert (fast.history.games[:num_turns]
+                        == stepped.history.games[:num_turns]).all()
+
+            fast_forwards += num_turns > 0
+            skipped_turns += num_turns
+
+    assert fast_forwards > 100
+    assert skipped_turns > 1000
+
+
+def test_search_fast_forward_matches_turns():
+    rng = random.Random(1)
+    fast_forwards = 0
+
+    for _ in range(8):
+        game = random_game(rng)
+        while not game.is_finished() and game.turn_count < 300:
+            game.advance(game.action_space.sample(rng))
+
+            fast = game.clone()
+            stepped = game.clone()
+            num_turns = fast.fast_forward()
+            if game.decision_pending():
+                assert num_turns == 0
+            for _ in range(num_turns):
+                Game.turn(stepped)
+            assert_same_state(fast, stepped)
+
+            # the actions are those of the state reached
+            if num_turns > 0:
+                assert list(fast.action_space) == list(ActionSpace(stepped))
+                fast_forwards += 1
+
+    assert fast_forwards > 50
@@ -0,0 +1,88 @@
+from ColonyClass import Planet, Colony
+from GameClass import Game
+from itertools import cycle
+import random
+
+# Game.food_allocation against the loop it replaced, which handed out
+# surplus food one unit at a time cycling over the colonies in deficit.
+
+starting_tech = [('construction', 6), ('chemistry', 2), ('sociology', 2),
+                 ('computers', 3), ('biology', 2)]
+
+
+def reference_distribute_food(game):
+    game.food_freighters = 0
+    for colony in game.colonies:
+        colony.imported_food = 0
+
+    deficit = sum(colony.food for colony in game.colonies
+                  if colony.food < 0)
+    surplus = sum(colony.food for colony in game.colonies
+                  if colony.food > 0)
+
+    colonies_cycle = cycle(game.colonies)
+    while surplus > 0 and deficit < 0 and game.available_freighters > 0:
+        colony = next(colonies_cycle)
+        if colony.food + colony.imported_food < 0:
+            colony.imported_food += 1
+            surplus -= 1
+            deficit += 1
+            game.food_freighters += 1
+
+
+def random_colony(rng, name):
+    planet = Planet(rng.choice(list(Colony.planet_size_map)),
+                    rng.choice(list(Colony.production_multiplier_map)),
+                    rng.choice(list(Colony.gravity_multiplier_map)),
+                    rng.choice(['terran', 'arid', 'swamp', 'ocean', 'tundra',
+                                'desert', 'gaia']))
+    population = rng.randint(1, 12)
+    farmers = rng.randint(0, population)
+    workers = rng.randint(0, population - farmers)
+    buildings = rng.sample(['hydroponicFarm', 'soilEnrichment',
+                            'subterraneanFarms', 'weatherController'],
+                           rng.randint(0, 2))
+    return Colony(planet, name, farmers, workers,
+                  population - farmers - workers, buildings)
+
+
+def random_game(rng):
+    colonies = [random_colony(rng, 'colony{}'.format(i))
+                for i in range(rng.randint(1, 6))]
+    game = Game(starting_tech, colonies, seed=rng.getrandbits(32))
+    game.total_freighters = rng.randint(0, 40)
+    game.in_transport = [None] * rng.randint(0, 3)
+    game.game_hash = game.compute_hash()
+    return game
+
+
+def test_food_allocation_matches_cycle_loop():
+    rng = random.Random(0)
+    distributed = 0
+    for _ in range(2000):
+        game = random_game(rng)
+        reference = game.clone()
+        reference_distribute_food(reference)
+
+        food_freighters, imported_foods = game.food_allocation()
+        assert food_freighters == reference.food_freighters
+        assert imported_foods == [colony.imported_food
+                                  for colony in reference.colonies]
+        distributed += food_freighters > 0
+
+    # the configurations exercise the distribution
+    assert distributed > 100
+
+
+def test_distribute_food_updates_game():
+    rng = random.Random(1)
+    for _ in range(200):
+        game = random_game(rng)
+        reference = game.clone()
+        reference_distribute_food(reference)
+
+        game.distribute_food()
+        assert game.food_freighters == reference.food_freighters
+        assert ([colony.imported_food for colony in game.colonies]
+                == [colony.imported_food for colony in reference.colonies])
+        assert game.game_hash == game.compute_hash()
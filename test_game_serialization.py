@@ -0,0 +1,47 @@
+from ColonyClass import Planet, Colony
+from GameClass import Game
+from MonteCarloTreeSearchClass import MonteCarloTreeSearch
+from GameSerialization import dumps, loads
+
+starting_tech = [('construction', 6), ('chemistry', 2), ('sociology', 2),
+                 ('computers', 3), ('biology', 2)]
+
+
+def assert_same_search(game, loaded):
+    assert type(loaded) is type(game)
+    assert Game.snapshot(loaded) == Game.snapshot(game)
+    assert loaded.state_hash == game.state_hash
+    assert loaded.col_distributions_list == game.col_distributions_list
+    assert loaded.res_choices_list == game.res_choices_list
+    assert list(loaded.action_space) == list(game.action_space)
+
+
+def test_round_trip():
+    colony = Colony(Planet('huge', 'abundant', 'normal', 'terran'),
+                    'colony1', 2, 2, 2,
+                    ['automatedFactory', 'hydroponicFarm', 'biospheres',
+                     'researchLab'])
+    game = MonteCarloTreeSearch(starting_tech, [colony], seed=0)
+    for _ in range(20):
+        game.advance(game.rollout_policy(game))
+
+    assert_same_search(game, loads(dumps(game)))
+
+    # loaded into an existing game of the same kind
+    other = MonteCarloTreeSearch(starting_tech, [colony.clone(None)])
+    assert_same_search(game, loads(dumps(game), other))
+
+
+# the counts of the action lists don't fit in 16 bits
+def test_round_trip_many_distributions():
+    colonies = [Colony(Planet('huge', 'abundant', 'normal', 'gaia'),
+                       'colony{}'.format(i), 10, 8, 8,
+                       ['hydroponicFarm', 'biospheres'])
+                for i in range(7)]
+    game = MonteCarloTreeSearch(starting_tech, colonies, seed=0)
+    assert len(game.col_distributions_list) > 65535
+
+    loaded = loads(dumps(game))
+    assert loaded.col_distributions_list == game.col_distributions_list
+    assert loaded.res_choices_list == game.res_choices_list
+    assert loaded.state_hash == game.state_hash
@@ -0,0 +1,32 @@
+import os
+import subprocess
+import sys
+
+# The search is imported by every worker process, so importing it must not
+# load the GUI, the worker pool or the optional recording and reporting
+# modules. Each check runs in a fresh interpreter, as modules imported by
+# other tests would otherwise be found in sys.modules.
+package_directory = os.path.dirname(os.path.abspath(__file__))
+
+optional_modules = ['matplotlib', 'multiprocessing', 'tkinter', 'tabulate',
+                    'TurnHistoryClass', 'Reporting', 'WorkerPoolClass']
+
+
+def loaded_modules(module):
+    code = ('import sys, {}; print("\\n".join(sys.modules))'
+            .format(module))
+    output = subprocess.run([sys.executable, '-c', code], check=True,
+                            cwd=package_directory, capture_output=True,
+                            text=True).stdout
+    return set(output.split())
+
+
+def test_search_import_is_headless():
+    modules = loaded_modules('MonteCarloTreeSearchClass')
+    assert 'MonteCarloTreeSearchClass' in modules
+    assert [name for name in optional_modules if name in modules] == []
+
+
+def test_game_import_is_headless():
+    modules = loaded_modules('GameClass')
+    assert [name for name in optional_modules if name in modules] == []